@@ -6,6 +6,7 @@ until nc -z $POSTGRES_HOST $POSTGRES_PORT; do
 done
 
 python manage.py migrate
+python manage.py createcachetable
 python manage.py collectstatic --no-input
 
 exec "$@"
\ No newline at end of file
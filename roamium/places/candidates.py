@@ -0,0 +1,183 @@
+import numpy as np
+
+
+def to_float(value):
+    '''Converts a numeric value to a float, replacing nan with None.'''
+    return None if np.isnan(value) else float(value)
+
+
+class CandidateSet:
+    '''
+    The candidate places of a nearby search, stored column-wise.
+
+    The categories are kept as a CSR index (category_indptr and
+    category_indices) into category_names, so that the places
+    are only converted to dictionaries at the response boundary.
+    '''
+
+    def __init__(self, ids=(), sources=(), names=(), longitudes=(),
+                 latitudes=(), distances=(), wheelchair=(), ratings=(),
+                 categories=()):
+        '''
+        categories: A list with the category names of each place.
+        '''
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.sources = self._objects(sources)
+        self.names = self._objects(names)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.distances = np.asarray(distances, dtype=float)
+        self.wheelchair = self._objects(wheelchair)
+        self.ratings = np.asarray(ratings, dtype=float)
+
+        # Build the CSR category index
+        self.category_names = []
+        category_index = {}
+        indptr = [0]
+        indices = []
+
+        for place_categories in categories:
+            for category in place_categories:
+                if category not in category_index:
+                    category_index[category] = len(self.category_names)
+                    self.category_names.append(category)
+
+                indices.append(category_index[category])
+
+            indptr.append(len(indices))
+
+        self.category_indptr = np.asarray(indptr, dtype=np.int64)
+        self.category_indices = np.asarray(indices, dtype=np.int64)
+
+    @staticmethod
+    def _objects(values) -> np.ndarray:
+        '''Creates a one-dimensional object array.'''
+        array = np.empty(len(values), dtype=object)
+        array[:] = list(values)
+        return array
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_records(cls, places: list):
+        '''Creates a candidate set from a list of place dictionaries.'''
+        return cls(
+            ids=[place['id'] for place in places],
+            sources=[place['source'] for place in places],
+            names=[place['name'] for place in places],
+            longitudes=[place['location']['longitude'] for place in places],
+            latitudes=[place['location']['latitude'] for place in places],
+            distances=[place['distance'] for place in places],
+            wheelchair=[place['wheelchair'] for place in places],
+            ratings=[
+                np.nan if place['rating'] is None else place['rating']
+                for place in places
+            ],
+            categories=[place['categories'] for place in places]
+        )
+
+    @classmethod
+    def concatenate(cls, *candidate_sets):
+        '''Combines the given candidate sets into a new one.'''
+        candidates = cls()
+
+        for column in (
+            'ids', 'sources', 'names', 'longitudes',
+            'latitudes', 'distances', 'wheelchair', 'ratings'
+        ):
+            setattr(candidates, column, np.concatenate(
+                [getattr(candidates, column)] +
+                [getattr(other, column) for other in candidate_sets]
+            ))
+
+        # Merge the category indices
+        category_index = {}
+        indptr = [np.zeros(1, dtype=np.int64)]
+        indices = []
+        offset = 0
+
+        for other in candidate_sets:
+            mapping = np.array([
+                category_index.setdefault(category, len(category_index))
+                for category in other.category_names
+            ], dtype=np.int64)
+
+            indptr.append(other.category_indptr[1:] + offset)
+            indices.append(mapping[other.category_indices])
+            offset += len(other.category_indices)
+
+        candidates.category_names = list(category_index)
+        candidates.category_indptr = np.concatenate(indptr)
+        candidates.category_indices = np.concatenate(
+            indices or [np.zeros(0, dtype=np.int64)]
+        )
+
+        return candidates
+
+    def place_categories(self, index) -> list:
+        '''Returns the category names of the place at the given index.'''
+        start, end = self.category_indptr[index:index + 2]
+        return [
+            self.category_names[category]
+            for category in self.category_indices[start:end]
+        ]
+
+    def category_matrix(self, rows=None):
+        '''
+        Returns a sparse (places x category_names) matrix with the number
+        of times each category appears in the places at the given rows.
+        '''
+        # scipy is only loaded once places are actually ranked
+        from scipy.sparse import csr_matrix
+
+        matrix = csr_matrix(
+            (
+                np.ones(len(self.category_indices)),
+                self.category_indices,
+                self.category_indptr
+            ),
+            shape=(len(self), len(self.category_names))
+        )
+
+        return matrix if rows is None else matrix[rows]
+
+    def distinct_categories(self) -> list:
+        '''Returns the distinct categories of all the places.'''
+        return [
+            self.category_names[category]
+            for category in np.unique(self.category_indices)
+        ]
+
+    def to_records(self, rows=None, **columns) -> list:
+        '''
+        Converts the places at the given rows (all by default) to
+        dictionaries. Additional columns can be given as keyword
+        arguments, with one value for each of the rows.
+        '''
+        if rows is None:
+            rows = range(len(self))
+
+        records = []
+
+        for position, row in enumerate(rows):
+            record = {
+                'id': int(self.ids[row]),
+                'source': self.sources[row],
+                'rating': to_float(self.ratings[row]),
+                'distance': float(self.distances[row]),
+                'location': {
+                    'latitude': float(self.latitudes[row]),
+                    'longitude': float(self.longitudes[row])
+                },
+                'categories': self.place_categories(row),
+                'name': self.names[row],
+                'wheelchair': self.wheelchair[row]
+            }
+
+            for column, values in columns.items():
+                record[column] = values[position]
+
+            records.append(record)
+
+        return records
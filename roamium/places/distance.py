@@ -0,0 +1,37 @@
+import numpy as np
+
+# The mean radius of the Earth in meters
+EARTH_RADIUS = 6371008.8
+
+
+def haversine_distances(longitude, latitude, longitudes, latitudes):
+    '''
+    Calculates the great-circle distances (in meters) from the given point
+    to each of the given points with a single vectorized operation.
+    '''
+    lon1, lat1 = np.radians(longitude), np.radians(latitude)
+    lon2 = np.radians(np.asarray(longitudes, dtype=float))
+    lat2 = np.radians(np.asarray(latitudes, dtype=float))
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def within_radius(longitude, latitude, elements, radius) -> list:
+    '''
+    Returns the OSM elements within the given radius (in meters)
+    from the given point.
+    '''
+    distances = haversine_distances(
+        longitude, latitude,
+        [element['lon'] for element in elements],
+        [element['lat'] for element in elements]
+    )
+
+    return [
+        element
+        for element, distance in zip(elements, distances)
+        if distance <= radius
+    ]
@@ -0,0 +1,68 @@
+from django.contrib.gis.db.models.functions import GeoFunc
+from django.db.models import BooleanField, FloatField, Func
+
+
+class GeographyCast(Func):
+    '''Casts a geometry to geography on PostGIS.'''
+    template = '(%(expressions)s)::geography'
+
+
+class GeographyFunc(GeoFunc):
+    '''
+    A function of two geometries, which are cast to geography on PostGIS,
+    so that the GiST index over the geography cast of a column is used.
+    '''
+    function = ''
+    geom_param_pos = (0, 1)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        clone = self.copy()
+        expressions = clone.get_source_expressions()
+        clone.set_source_expressions([
+            GeographyCast(expression) for expression in expressions[:2]
+        ] + expressions[2:])
+
+        return super(GeographyFunc, clone).as_sql(
+            compiler, connection, **extra_context
+        )
+
+
+class DWithin(GeographyFunc):
+    '''
+    Checks whether two geometries are within the given distance (in meters)
+    of each other, using a sphere like the Distance function does.
+    '''
+    output_field = BooleanField()
+    template = 'ST_DWithin(%(expressions)s, false)'
+
+    def __init__(self, expr1, expr2, distance, **extra):
+        super().__init__(expr1, expr2, distance, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template='PtDistWithin(%(expressions)s, 0)',
+            **extra_context
+        )
+
+
+class KNNDistance(GeographyFunc):
+    '''
+    The distance between two geometries for ordering by proximity,
+    which PostGIS calculates with the index-assisted KNN operator (<->).
+    '''
+    output_field = FloatField()
+    arg_joiner = ' <-> '
+    template = '%(expressions)s'
+
+    def __init__(self, expr1, expr2, **extra):
+        super().__init__(expr1, expr2, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # SpatiaLite returns NULL instead of zero on geodetic coordinates
+        return super().as_sql(
+            compiler, connection,
+            template='COALESCE(Distance(%(expressions)s, 0), 0)',
+            arg_joiner=', ',
+            **extra_context
+        )
@@ -0,0 +1,256 @@
+from abc import ABC, abstractmethod
+from collections import Counter
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.contrib.gis.geos import Polygon
+
+from .models import Place, OSMNode
+from .overpass import get_osm_places, element_categories
+from .tiles import OverpassTileCache, Freshness, FRESH, tile_bounds, \
+    tile_for_point
+
+# Changing the version invalidates the histograms of every tile.
+# It is kept in the default cache, which is never culled, while the
+# histograms are kept in the 'tiles' cache.
+VERSION_KEY = 'categories:version'
+
+
+def get_version() -> str:
+    return cache.get_or_set(VERSION_KEY, lambda: uuid.uuid4().hex, None)
+
+
+def invalidate_histograms():
+    '''Invalidates the category histograms of every tile.'''
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def tiles_polygon(tiles, zoom) -> Polygon:
+    '''Returns the bounding box of the given tiles as a polygon.'''
+    bounds = [tile_bounds(x, y, zoom) for x, y in tiles]
+
+    return Polygon.from_bbox((
+        min(bound[1] for bound in bounds),
+        min(bound[0] for bound in bounds),
+        max(bound[3] for bound in bounds),
+        max(bound[2] for bound in bounds),
+    ))
+
+
+class CategoryHistograms(ABC):
+    '''
+    Caches the number of places per category of each slippy map tile,
+    so that the categories of an area are collected by combining the
+    histograms of its tiles instead of loading its places.
+    '''
+    prefix = None
+
+    # The cache timeout of the histograms (None for no expiration)
+    timeout = None
+
+    def __init__(self, zoom=None):
+        self.zoom = zoom or settings.OVERPASS_TILE_ZOOM
+
+    def key(self, tile, version) -> str:
+        x, y = tile
+        return f'categories:{self.prefix}:{version}:{self.zoom}:{x}:{y}'
+
+    @abstractmethod
+    def build(self, tiles) -> dict:
+        '''
+        Builds the histogram entries of the given tiles.
+        Tiles whose places could not be fetched are omitted.
+        '''
+        pass
+
+    def entry_timeout(self, entry):
+        return self.timeout
+
+    def get_entries(self, tiles) -> dict:
+        '''
+        Returns the histogram entries of the given tiles,
+        building only the ones that are missing from the cache.
+        '''
+        version = get_version()
+        keys = {tile: self.key(tile, version) for tile in tiles}
+
+        cached = caches['tiles'].get_many(keys.values())
+
+        entries = {
+            tile: cached[keys[tile]] for tile in tiles if keys[tile] in cached
+        }
+        missing = [tile for tile in tiles if tile not in entries]
+
+        if missing:
+            for tile, entry in self.build(missing).items():
+                timeout = self.entry_timeout(entry)
+
+                if timeout is None or timeout > 0:
+                    caches['tiles'].set(keys[tile], entry, timeout)
+
+                entries[tile] = entry
+
+        return entries
+
+    def get(self, tiles) -> Counter:
+        '''Returns the combined histogram of the given tiles.'''
+        histogram = Counter()
+
+        for entry in self.get_entries(tiles).values():
+            histogram.update(entry['categories'])
+
+        return histogram
+
+
+class LocalCategoryHistograms(CategoryHistograms):
+    '''
+    The category histograms of the local places, which are invalidated
+    per tile when the places change (see signals). They also expire
+    after CATEGORY_HISTOGRAMS_TIMEOUT, so that changes which skip the
+    signals (e.g. bulk updates or raw SQL) are eventually picked up.
+    '''
+    prefix = 'local'
+
+    def __init__(self, zoom=None):
+        super().__init__(zoom)
+        self.timeout = settings.CATEGORY_HISTOGRAMS_TIMEOUT
+
+    def build(self, tiles) -> dict:
+        built = time.time()
+        histograms = {tile: Counter() for tile in tiles}
+
+        # A place belongs to each of its categories only once
+        for location, category in Place.categories.through.objects.filter(
+            place__location__contained=tiles_polygon(tiles, self.zoom)
+        ).values_list('place__location', 'category__name'):
+            tile = tile_for_point(location.x, location.y, self.zoom)
+
+            if tile in histograms:
+                histograms[tile][category] += 1
+
+        return {
+            tile: {'categories': dict(histogram), 'built': built}
+            for tile, histogram in histograms.items()
+        }
+
+    def invalidate(self, *locations):
+        '''Invalidates the histograms of the tiles of the given points.'''
+        version = get_version()
+
+        caches['tiles'].delete_many([
+            self.key(tile_for_point(point.x, point.y, self.zoom), version)
+            for point in locations if point is not None
+        ])
+
+
+class OSMCategoryHistograms(CategoryHistograms):
+    '''The category histograms of the OSM places.'''
+
+    def __init__(self, zoom=None):
+        super().__init__(zoom)
+        self.timeout = settings.OVERPASS_CACHE_TIMEOUT
+
+    @abstractmethod
+    def elements(self, tiles) -> dict:
+        '''Returns the OSM elements of the given tiles by tile.'''
+        pass
+
+    def build(self, tiles) -> dict:
+        built = time.time()
+        elements = self.elements(tiles)
+
+        osm_places = get_osm_places([
+            element['id']
+            for tile_elements in elements.values()
+            for element in tile_elements
+        ])
+
+        entries = {}
+
+        for tile, tile_elements in elements.items():
+            histogram = Counter()
+
+            for element in tile_elements:
+                # Count each place once per category
+                histogram.update(set(element_categories(
+                    element.get('tags', {}),
+                    osm_places.get(str(element['id']))
+                )))
+
+            entries[tile] = {'categories': dict(histogram), 'built': built}
+
+        return entries
+
+
+class OverpassCategoryHistograms(OSMCategoryHistograms):
+    '''
+    The category histograms of the places fetched from Overpass,
+    which are built from the tile cache and expire with its tiles.
+    The freshness of the histograms is kept in self.freshness.
+    '''
+
+    def __init__(self, builder, zoom=None):
+        super().__init__(zoom)
+        self.tile_cache = OverpassTileCache(builder, zoom=self.zoom)
+        self.prefix = 'osm:' + self.tile_cache.signature
+        self.freshness = None
+
+    def elements(self, tiles) -> dict:
+        entries = self.tile_cache.get_tiles(tiles)
+
+        # Keep the fetch time of the elements instead of the build time
+        self.fetched = {
+            tile: entry['fetched'] for tile, entry in entries.items()
+        }
+
+        return {tile: entry['elements'] for tile, entry in entries.items()}
+
+    def build(self, tiles) -> dict:
+        entries = super().build(tiles)
+
+        for tile, entry in entries.items():
+            entry['fetched'] = self.fetched[tile]
+
+        return entries
+
+    def entry_timeout(self, entry):
+        # Histograms of stale tiles are rebuilt once they are refreshed
+        return self.timeout - (time.time() - entry['fetched'])
+
+    def get_entries(self, tiles) -> dict:
+        self.tile_cache.freshness = None
+        entries = super().get_entries(tiles)
+        now = time.time()
+
+        # Cached histograms are only kept while their tiles are fresh
+        freshness = self.tile_cache.freshness
+        self.freshness = Freshness(
+            FRESH if freshness is None else freshness.status,
+            max(
+                (max(now - entry['fetched'], 0)
+                 for entry in entries.values()),
+                default=None
+            )
+        )
+
+        return entries
+
+
+class MirrorCategoryHistograms(OSMCategoryHistograms):
+    '''The category histograms of the places of the local OSM mirror.'''
+    prefix = 'osm:mirror'
+
+    def elements(self, tiles) -> dict:
+        elements = {tile: [] for tile in tiles}
+
+        for node in OSMNode.objects.filter(
+            location__contained=tiles_polygon(tiles, self.zoom)
+        ):
+            tile = tile_for_point(node.location.x, node.location.y, self.zoom)
+
+            if tile in elements:
+                elements[tile].append(node.element)
+
+        return elements
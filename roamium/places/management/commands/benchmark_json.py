@@ -0,0 +1,66 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer as DRFJSONRenderer
+
+from places.candidates import CandidateSet
+from roamium.renderers import JSONRenderer
+
+CATEGORIES = ('cafe', 'bar', 'restaurant', 'museum', 'park', 'bakery')
+
+
+def create_places(count) -> CandidateSet:
+    '''Create a candidate set of random places around Athens.'''
+    random.seed(0)
+
+    return CandidateSet(
+        ids=list(range(count)),
+        sources=[random.choice(('roamium', 'osm')) for _ in range(count)],
+        names=[f'Καφέ {i}' for i in range(count)],
+        longitudes=[23.7 + random.random() / 10 for _ in range(count)],
+        latitudes=[37.9 + random.random() / 10 for _ in range(count)],
+        distances=[random.random() * 5000 for _ in range(count)],
+        wheelchair=[
+            random.choice(('yes', 'no', 'limited', None))
+            for _ in range(count)
+        ],
+        ratings=[random.choice((1.0, 3.5, 5.0)) for _ in range(count)],
+        categories=[
+            random.sample(CATEGORIES, random.randint(1, 3))
+            for _ in range(count)
+        ]
+    )
+
+
+class Command(BaseCommand):
+    help = 'Compares the encoding time of nearby place responses ' \
+        'between the DRF and the API JSON renderers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--places', type=int, default=5000,
+            help='Number of places in the response'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Number of times each response is encoded'
+        )
+
+    def handle(self, *args, **options):
+        payload = create_places(options['places']).to_records()
+        repeat = options['repeat']
+
+        renderers = {
+            'DRF JSONRenderer': DRFJSONRenderer(),
+            'API JSONRenderer': JSONRenderer(),
+        }
+
+        for name, renderer in renderers.items():
+            seconds = timeit.timeit(
+                lambda: renderer.render(payload), number=repeat
+            ) / repeat
+            self.stdout.write(f'{name}: {seconds * 1000:.2f} ms')
+
+        size = len(JSONRenderer().render(payload))
+        self.stdout.write(f'Response size: {size} bytes')
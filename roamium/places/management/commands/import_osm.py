@@ -0,0 +1,135 @@
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from places.histograms import invalidate_histograms
+from places.models import OSMNode
+from places.overpass import is_place
+from places.services.jsonstream import iter_array
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def read_json(path):
+    '''
+    Yields the node elements of an Overpass JSON dump,
+    parsing them one at a time instead of loading the whole file.
+    '''
+    with open(path, 'rb') as dump:
+        chunks = iter(lambda: dump.read(CHUNK_SIZE), b'')
+
+        for element in iter_array(chunks, 'elements'):
+            if element.get('type', 'node') == 'node':
+                yield element
+
+
+def read_pbf(path):
+    '''Yields the tagged nodes of an OSM PBF extract as Overpass elements.'''
+    try:
+        import osmium
+    except ImportError:
+        raise CommandError(
+            "The 'osmium' package is required to import PBF extracts."
+        )
+
+    for node in osmium.FileProcessor(path, osmium.osm.NODE):
+        # Skip the untagged nodes that make up ways
+        if 'name' not in node.tags:
+            continue
+
+        yield {
+            'type': 'node',
+            'id': node.id,
+            'lon': node.location.lon,
+            'lat': node.location.lat,
+            'tags': {tag.k: tag.v for tag in node.tags}
+        }
+
+
+class Command(BaseCommand):
+    help = 'Imports the places of an OSM extract (.osm.pbf) ' \
+        'or an Overpass JSON dump into the local OSM mirror.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the .osm.pbf or .json file')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Number of nodes inserted per query'
+        )
+        parser.add_argument(
+            '--append', action='store_true',
+            help='Keep the existing nodes instead of replacing them, '
+            'updating the ones that are imported again'
+        )
+
+    def save_batch(self, batch, append) -> int:
+        '''
+        Inserts the given nodes, updating the existing ones when appending.
+        Returns the number of updated nodes.
+        '''
+        existing = set()
+
+        if append:
+            existing = set(OSMNode.objects.filter(
+                osm_id__in=[node.osm_id for node in batch]
+            ).values_list('osm_id', flat=True))
+
+            OSMNode.objects.bulk_update(
+                [node for node in batch if node.osm_id in existing],
+                ['location', 'tags']
+            )
+
+        # Nodes repeated in the same file are only inserted once
+        OSMNode.objects.bulk_create(
+            [node for node in batch if node.osm_id not in existing],
+            ignore_conflicts=True
+        )
+
+        return len(existing)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+
+        if path.endswith('.pbf'):
+            elements = read_pbf(path)
+        elif path.endswith('.json'):
+            elements = read_json(path)
+        else:
+            raise CommandError('Only .osm.pbf and .json files are supported.')
+
+        imported = updated = 0
+
+        with transaction.atomic():
+            if not options['append']:
+                OSMNode.objects.all().delete()
+
+            batch = []
+
+            for element in elements:
+                tags = element.get('tags', {})
+
+                # Apply the same filters as the Overpass queries
+                if not is_place(tags):
+                    continue
+
+                batch.append(OSMNode(
+                    osm_id=element['id'],
+                    location=Point(element['lon'], element['lat'], srid=4326),
+                    tags=tags
+                ))
+
+                if len(batch) >= batch_size:
+                    updated += self.save_batch(batch, options['append'])
+                    imported += len(batch)
+                    batch = []
+
+            updated += self.save_batch(batch, options['append'])
+            imported += len(batch)
+
+        # The category histograms of the mirror are outdated
+        invalidate_histograms()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} places ({updated} updated).'
+        ))
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.13 on 2026-10-17 10:12
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0006_alter_osmplace_osm_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OSMNode',
+            fields=[
+                ('osm_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('location', django.contrib.gis.db.models.fields.PointField(srid=4326)),
+                ('tags', models.JSONField(default=dict)),
+            ],
+            options={
+                'verbose_name': 'OSM Node',
+                'verbose_name_plural': 'OSM Nodes',
+            },
+        ),
+    ]
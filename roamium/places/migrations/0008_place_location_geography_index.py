@@ -0,0 +1,31 @@
+# Generated by Django 3.2.13 on 2026-10-17 13:40
+
+from django.db import migrations
+
+INDEX_NAME = 'places_place_location_geography_idx'
+
+
+def create_geography_index(apps, schema_editor):
+    # The geography cast of the location is only indexed on PostGIS,
+    # SpatiaLite uses the spatial index of the location column instead.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON places_place '
+            'USING GIST ((location::geography));'
+        )
+
+
+def drop_geography_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME};')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0007_osmnode'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_geography_index, drop_geography_index),
+    ]
@@ -61,3 +61,28 @@ class OSMPlace(models.Model):
 
     def get_absolute_url(self):
         return reverse("osmplace-detail", kwargs={"pk": self.pk})
+
+
+class OSMNode(models.Model):
+    '''A place imported from an OpenStreetMap extract (see `import_osm`).'''
+    osm_id = models.BigIntegerField(primary_key=True)
+    location = models.PointField(spatial_index=True)
+    tags = models.JSONField(default=dict)
+
+    class Meta:
+        verbose_name = "OSM Node"
+        verbose_name_plural = "OSM Nodes"
+
+    def __str__(self):
+        return f'{self.tags.get("name", "")} ({self.osm_id})'
+
+    @property
+    def element(self) -> dict:
+        '''The node in the format of an Overpass element.'''
+        return {
+            'type': 'node',
+            'id': self.osm_id,
+            'lon': self.location.x,
+            'lat': self.location.y,
+            'tags': self.tags
+        }
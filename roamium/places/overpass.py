@@ -1,8 +1,24 @@
+import logging
+import re
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.gis.geos import Point, Polygon
+import numpy as np
 import requests
-from django.contrib.gis.geos import Point
 
-from .serializers import PlaceSerializer
-from .models import Place, OSMPlace
+from .candidates import CandidateSet
+from .models import OSMPlace, OSMNode
+from .services.http import get_http_client
+from .services.rating import PlaceRatingService
+from .services.circuitbreaker import CircuitBreaker, CircuitOpenError
+from .services.jsonstream import iter_array
+from .tiles import OverpassTileCache, OverpassError, Freshness, FRESH, \
+    UNAVAILABLE, tiles_for_radius, bounding_box
+from .distance import haversine_distances, within_radius
+
+logger = logging.getLogger(__name__)
+
+OVERPASS_URL = 'https://overpass-api.de/api/interpreter'
 
 KEYWORD_TAGS = (
     'amenity', 'shop', 'cuisine', 'alcohol',
@@ -15,89 +31,357 @@ EXCLUDED_AMENITIES = (
     'courthouse', 'bureau_de_change', 'taxi', 'doctors', 'police'
 )
 
+OSM_PLACE_TAGS = ('amenity', 'historic', 'tourism', 'shop')
+
+EXCLUDED_AMENITIES_REGEX = '|'.join(EXCLUDED_AMENITIES)
+
+EXCLUDED_AMENITIES_PATTERN = re.compile(EXCLUDED_AMENITIES_REGEX)
+
+# The tags of the OSM elements that are read to build the places
+OUTPUT_TAGS = ('name', 'wheelchair') + KEYWORD_TAGS
+
+# The remarks of the Overpass responses of failed queries
+OVERPASS_ERROR_REMARKS = ('runtime error', 'runtime remark')
+
+
+def is_place(tags: dict) -> bool:
+    '''
+    Checks whether an OSM element with the given tags matches
+    the nodes queried for every tag in OSM_PLACE_TAGS.
+    '''
+    if 'name' not in tags:
+        return False
+
+    if not any(tag in tags for tag in OSM_PLACE_TAGS):
+        return False
+
+    # Overpass regular expressions are not anchored
+    return not EXCLUDED_AMENITIES_PATTERN.search(tags.get('amenity', ''))
+
+
+def get_osm_places(ids) -> dict:
+    '''
+    Returns the mirrored local places (with their categories)
+    of the OSM elements with the given ids, by their OSM id.
+    '''
+    return OSMPlace.objects.prefetch_related('categories').in_bulk(
+        [str(place_id) for place_id in ids]
+    )
+
+
+def element_categories(tags: dict, osm_place=None) -> list:
+    '''
+    Returns the categories of an OSM element with the given tags,
+    starting with the categories of its mirrored local place, if any.
+    '''
+    categories = [] if osm_place is None else [
+        str(category) for category in osm_place.categories.all()
+    ]
+
+    # Extract categories from tags
+    for label in KEYWORD_TAGS:
+        if label in tags:
+            # Multiple values are separated with ';'
+            categories += tags[label].split(';')
+
+    return categories
+
+
+def normalize_element(element: dict) -> dict:
+    '''
+    Converts an element of the Overpass output to a node with an 'id',
+    'lon', 'lat' and non-empty 'tags', whether it was output with its
+    coordinates, its center or a geometry (derived elements).
+    '''
+    if 'lat' in element:
+        longitude, latitude = element['lon'], element['lat']
+    elif 'center' in element:
+        longitude = element['center']['lon']
+        latitude = element['center']['lat']
+    else:
+        longitude, latitude = element['geometry']['coordinates']
+
+    return {
+        'type': 'node',
+        'id': int(element['id']),
+        'lon': longitude,
+        'lat': latitude,
+        'tags': {
+            key: value
+            for key, value in element.get('tags', {}).items() if value
+        }
+    }
+
 
 class QueryBuilder:
 
-    def __init__(self, longitude, latitude, radius=1000):
+    def __init__(self, longitude, latitude, radius=1000,
+                 output_tags=OUTPUT_TAGS, element_filter=None):
+        '''
+        output_tags: The only tags included in the output (all if None).
+        element_filter: A predicate of the element tags. The elements
+        that do not match it are dropped while the response is parsed.
+        '''
         self.longitude = longitude
         self.latitude = latitude
         self.user_location = Point(self.longitude, self.latitude, srid=4326)
         self.radius = radius
-        self.query_elements = [
-            '[out:json];(',
-            ');out;'
-        ]
+        self.output_tags = output_tags
+        self.element_filter = element_filter
+        self.nodes = []
+        self.node_ids = []
+        self.freshness = None
 
     def add_node(self, **kwargs):
-        node = 'node'
-        for key, value in kwargs.items():
-            node += f'[{key}={value}]' if value else f'[{key}]'
+        '''
+        Adds a node statement with a filter for each of the given tags.
+        Tags with an empty value only need to exist.
+        '''
+        self.nodes.append(tuple(kwargs.items()))
 
-        # Exclude specific types of amenities
-        excluded = '|'.join(EXCLUDED_AMENITIES)
-        node += f'[amenity!~"{excluded}"]'
+    def add_node_by_id(self, id):
+        self.node_ids.append(id)
 
-        node += f'(around: {self.radius}, {self.latitude}, {self.longitude});'
-        self.query_elements.insert(-1, node)
+    @property
+    def node_filters(self) -> list:
+        '''
+        Compiles the filters of the node statements.
 
-    def add_node_by_id(self, id):
-        self.query_elements.insert(-1, f'node({id});')
+        Nodes that only differ in one tag that needs to exist
+        are combined into a single filter with a tag key regex,
+        so that Overpass scans the area only once for all of them.
+        '''
+        groups = {}
+
+        for node in self.nodes:
+            # The last tag without a value is allowed to differ
+            keys = [key for key, value in node if not value]
+            varying = keys[-1] if keys else None
+
+            common = tuple(tag for tag in node if tag[0] != varying)
+            groups.setdefault(common, []).append(varying)
+
+        node_filters = []
+
+        for common, keys in groups.items():
+            node_filter = ''.join(
+                f'[{key}={value}]' if value else f'[{key}]'
+                for key, value in common
+            )
+
+            # A node without a varying tag matches its whole group
+            if None not in keys:
+                if len(keys) == 1:
+                    node_filter += f'[{keys[0]}]'
+                else:
+                    node_filter += '[~"^(' + '|'.join(keys) + ')$"~"."]'
+
+            # Exclude specific types of amenities
+            node_filter += f'[amenity!~"{EXCLUDED_AMENITIES_REGEX}"]'
+
+            node_filters.append(node_filter)
+
+        return node_filters
+
+    def compile(self, area=None) -> str:
+        '''
+        Compiles the query for the given area filter,
+        which defaults to the builder's radius around its location.
+        '''
+        if area is None:
+            area = f'around:{self.radius},{self.latitude},{self.longitude}'
+
+        settings_statement = '[out:json]' \
+            f'[timeout:{settings.OVERPASS_QUERY_TIMEOUT}]' \
+            f'[maxsize:{settings.OVERPASS_QUERY_MAXSIZE}];'
+
+        statements = [f'node{node}({area});' for node in self.node_filters]
+        statements += [f'node({id});' for id in self.node_ids]
+
+        # Only keep the tags that are actually read
+        if self.output_tags is None:
+            convert_statement = ''
+        else:
+            convert_statement = 'convert node ::id=id(),::geom=geom(),' + \
+                ','.join(f'{tag}=t["{tag}"]' for tag in self.output_tags) + \
+                ';'
+
+        return settings_statement + '(' + ''.join(statements) + ');' + \
+            convert_statement + 'out center qt;'
 
     @property
     def query(self):
-        return ''.join(self.query_elements)
+        return self.compile()
 
-    def run_query(self):
-        response = requests.post(
-            'https://overpass-api.de/api/interpreter',
-            data={'data': self.query}
+    @property
+    def cacheable(self) -> bool:
+        '''
+        Only area queries over a reasonable number of tiles are cached,
+        as nodes fetched by id are not bound to the search area.
+        '''
+        if not settings.OVERPASS_CACHE_TIMEOUT or self.node_ids:
+            return False
+
+        tiles = tiles_for_radius(
+            self.longitude, self.latitude,
+            self.radius, settings.OVERPASS_TILE_ZOOM
         )
-        data = response.json()
 
-        places = []
+        return len(tiles) <= settings.OVERPASS_MAX_TILES
 
-        for element in data['elements']:
-            place_id = element['id']
-            location = Point(element['lon'], element['lat'], srid=4326)
+    def fetch_elements(self, query) -> list:
+        '''
+        Runs the given query against the Overpass API.
 
-            tags = element.get('tags', {})
-            name = tags.get('name', '')
-            wheelchair = tags.get('wheelchair')
+        Raises OverpassError if the query fails, or without querying
+        Overpass while the circuit is open after repeated failures.
+        '''
+        def post():
+            try:
+                response = get_http_client().post(
+                    OVERPASS_URL, data={'data': query}, stream=True
+                )
+                try:
+                    response.raise_for_status()
+                    return list(self.stream_elements(response))
+                finally:
+                    response.close()
+            except (requests.RequestException, ValueError, KeyError) as e:
+                raise OverpassError(str(e)) from e
 
-            # Get mirrored local place for additional information
-            place = PlaceSerializer(
-                Place(
-                    id=place_id, name=name,
-                    location=location, wheelchair=wheelchair
-                ),
-                source='osm'
-            ).data
+        circuit_breaker = CircuitBreaker(
+            cache, 'overpass',
+            threshold=settings.OVERPASS_CIRCUIT_THRESHOLD,
+            reset_timeout=settings.OVERPASS_CIRCUIT_RESET_TIMEOUT,
+            exceptions=(OverpassError,)
+        )
 
-            place['distance'] = self.user_location.distance(location) * 100000
+        try:
+            return circuit_breaker.call(post)
+        except CircuitOpenError:
+            raise OverpassError('Overpass is unavailable!')
 
+    def stream_elements(self, response):
+        '''
+        Parses the elements of a streamed Overpass response one chunk
+        at a time, yielding the normalized elements that match the
+        element filter, so that the whole body is never in memory.
+        '''
+        chunks = response.iter_content(
+            chunk_size=settings.OVERPASS_CHUNK_SIZE
+        )
+        siblings = {}
+
+        for element in iter_array(chunks, 'elements', siblings):
+            element = normalize_element(element)
+
+            if self.element_filter is None or \
+                    self.element_filter(element['tags']):
+                yield element
+
+        # Overpass still responds with 200 when a query fails midway
+        # (e.g. on timeout or maxsize), with a remark after the partial
+        # elements, which must not be cached as a complete result
+        remark = siblings.get('remark', '')
+        if any(error in remark for error in OVERPASS_ERROR_REMARKS):
+            raise OverpassError(remark)
+
+    def run_query(self) -> CandidateSet:
+        '''
+        Runs the query against the Overpass API.
+        If Overpass fails, the cached (possibly stale) elements are used,
+        if any. The freshness of the elements is kept in self.freshness.
+        '''
+        if self.cacheable:
+            tile_cache = OverpassTileCache(self)
+            elements = tile_cache.get_elements()
+            self.freshness = tile_cache.freshness
+        else:
             try:
-                osm_place = OSMPlace.objects.get(osm_id=place_id)
+                elements = self.fetch_elements(self.query)
+                self.freshness = Freshness(FRESH, 0)
+            except OverpassError:
+                logger.warning('Failed to run the Overpass query')
+                elements = []
+                self.freshness = Freshness(UNAVAILABLE, None)
 
+        return self.process_elements(elements)
+
+    def run_local_query(self):
+        '''
+        Runs the query against the local OSM mirror instead of Overpass.
+        The mirror only contains places, so the node filters are implied.
+        '''
+        south, west, north, east = bounding_box(
+            self.longitude, self.latitude, self.radius
+        )
+
+        nodes = OSMNode.objects.filter(
+            location__contained=Polygon.from_bbox((west, south, east, north))
+        )
+
+        return self.process_elements(within_radius(
+            self.longitude, self.latitude,
+            [node.element for node in nodes], self.radius
+        ))
+
+    def process_elements(self, elements) -> CandidateSet:
+        '''Converts the OSM elements to a candidate set of places.'''
+        ids = [element['id'] for element in elements]
+
+        # Get the mirrored local places for additional information
+        osm_places = get_osm_places(ids)
+
+        ratings = PlaceRatingService().get_ratings(
+            [('osm', place_id) for place_id in ids]
+        )
+
+        names = []
+        wheelchair = []
+        categories = []
+
+        for element in elements:
+            tags = element.get('tags', {})
+            name = tags.get('name', '')
+            place_wheelchair = tags.get('wheelchair')
+
+            osm_place = osm_places.get(str(element['id']))
+
+            if osm_place is not None:
                 # Overwrite existing data
                 if osm_place.name:
-                    place['name'] = osm_place.name
+                    name = osm_place.name
 
                 if osm_place.wheelchair:
-                    place['wheelchair'] = osm_place.wheelchair
-
-                place['categories'] = [
-                    str(category) for category in osm_place.categories.all()
-                ]
+                    place_wheelchair = osm_place.wheelchair
 
-            except OSMPlace.DoesNotExist:
-                place['categories'] = []
+            names.append(name)
+            wheelchair.append(place_wheelchair)
+            categories.append(element_categories(tags, osm_place))
 
-            # Extract categories from tags
-            for label in KEYWORD_TAGS:
-                if label in tags:
-                    # Multiple values are separated with ';'
-                    place['categories'] += tags[label].split(';')
+        longitudes = np.array(
+            [element['lon'] for element in elements], dtype=float
+        )
+        latitudes = np.array(
+            [element['lat'] for element in elements], dtype=float
+        )
 
-            places.append(place)
+        distances = haversine_distances(
+            self.longitude, self.latitude, longitudes, latitudes
+        )
 
-        return places
+        return CandidateSet(
+            ids=ids,
+            sources=['osm'] * len(ids),
+            names=names,
+            longitudes=longitudes,
+            latitudes=latitudes,
+            distances=distances,
+            wheelchair=wheelchair,
+            ratings=[
+                ratings[('osm', place_id)].stars
+                if ('osm', place_id) in ratings else np.nan
+                for place_id in ids
+            ],
+            categories=categories
+        )
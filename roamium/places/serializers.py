@@ -1,9 +1,9 @@
 from drf_extra_fields.geo_fields import PointField
 from rest_framework import serializers
-from django.db.models import Avg
+from django.db import models
 
 from .models import Place, Category
-from routes.models import Review
+from .services.rating import PlaceRatingService
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -12,6 +12,36 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+def get_place_rating(serializer, obj):
+    '''
+    Returns the rating of a place, using the ratings
+    provided through the serializer context when available.
+    '''
+    ratings = serializer.context.get('ratings')
+
+    if ratings is None:
+        return PlaceRatingService().get_rating(
+            serializer.place_source, obj.id
+        ).stars
+
+    rating = ratings.get((serializer.place_source, obj.id))
+    return rating.stars if rating else None
+
+
+class PlaceListSerializer(serializers.ListSerializer):
+    '''Fetches the ratings of all the listed places with a single query.'''
+
+    def to_representation(self, data):
+        places = list(data.all() if isinstance(data, models.Manager) else data)
+
+        if 'ratings' not in self.context:
+            self.context['ratings'] = PlaceRatingService().get_ratings([
+                (self.child.place_source, place.id) for place in places
+            ])
+
+        return super().to_representation(places)
+
+
 class PlaceSerializer(serializers.ModelSerializer):
     source = serializers.SerializerMethodField()
     rating = serializers.SerializerMethodField()
@@ -29,42 +59,88 @@ class PlaceSerializer(serializers.ModelSerializer):
         return self.place_source
 
     def get_rating(self, obj):
-        return list(Review.objects.filter(
-            visit__place_source=self.place_source,
-            visit__place_id=obj.id
-        ).aggregate(Avg('stars')).values())[0]
+        return get_place_rating(self, obj)
 
     class Meta:
         model = Place
         fields = '__all__'
+        list_serializer_class = PlaceListSerializer
 
 
-class PlaceDistanceSerializer(serializers.ModelSerializer):
-    source = serializers.SerializerMethodField()
-    rating = serializers.SerializerMethodField()
-    distance = serializers.SerializerMethodField()
-    location = PointField()
-    categories = serializers.ListSerializer(
-        read_only=True,
-        child=serializers.CharField()
-    )
+# The fields of the place rows read by PlaceReadSerializer
+PLACE_VALUES = ('id', 'name', 'location', 'wheelchair')
 
-    def __init__(self, *args, **kwargs):
-        self.place_source = kwargs.pop('source', 'roamium')
-        super().__init__(*args, **kwargs)
 
-    def get_source(self, obj):
-        return self.place_source
+def get_place_categories(ids) -> dict:
+    '''
+    Returns the category names of the places with the given ids
+    by place id, collecting them in a single query.
+    '''
+    categories = {place_id: [] for place_id in ids}
 
-    def get_rating(self, obj):
-        return list(Review.objects.filter(
-            visit__place_source=self.place_source,
-            visit__place_id=obj.id
-        ).aggregate(Avg('stars')).values())[0]
+    for place_id, category in Place.categories.through.objects.filter(
+        place_id__in=ids
+    ).values_list('place_id', 'category__name').order_by('id'):
+        categories[place_id].append(category)
+
+    return categories
+
+
+class PlaceReadListSerializer(serializers.ListSerializer):
+    '''
+    Fetches the categories and ratings of all the listed
+    place rows with a single query each.
+    '''
+
+    def to_representation(self, data):
+        rows = list(data)
+        ids = [row['id'] for row in rows]
+
+        if 'categories' not in self.context:
+            self.context['categories'] = get_place_categories(ids)
+
+        if 'ratings' not in self.context:
+            self.context['ratings'] = PlaceRatingService().get_ratings([
+                ('roamium', place_id) for place_id in ids
+            ])
 
-    def get_distance(self, obj):
-        return obj.distance.m
+        return [self.child.to_representation(row) for row in rows]
+
+
+class PlaceReadSerializer(serializers.BaseSerializer):
+    '''
+    Read-only serializer of local places with the same output as
+    PlaceSerializer, for rows of `values(*PLACE_VALUES)`
+    instead of model instances.
+    '''
+
+    def to_representation(self, row):
+        place_id = row['id']
+
+        categories = self.context.get('categories')
+        if categories is None:
+            categories = get_place_categories([place_id])
+
+        ratings = self.context.get('ratings')
+        if ratings is None:
+            ratings = PlaceRatingService().get_ratings(
+                [('roamium', place_id)]
+            )
+
+        rating = ratings.get(('roamium', place_id))
+
+        return {
+            'id': place_id,
+            'source': 'roamium',
+            'rating': rating.stars if rating else None,
+            'location': {
+                'latitude': row['location'].y,
+                'longitude': row['location'].x
+            },
+            'categories': categories.get(place_id, []),
+            'name': row['name'],
+            'wheelchair': row['wheelchair']
+        }
 
     class Meta:
-        model = Place
-        fields = '__all__'
+        list_serializer_class = PlaceReadListSerializer
@@ -0,0 +1,76 @@
+import time
+
+
+class CircuitOpenError(Exception):
+    '''Raised when a call is attempted while the circuit is open.'''
+    pass
+
+
+class CircuitBreaker:
+    '''
+    Stops calling a failing service, sharing its state between
+    worker processes through the given cache.
+
+    After `threshold` consecutive failures the circuit opens and calls
+    fail fast for `reset_timeout` seconds. Then a single trial call is
+    let through, which closes the circuit on success or opens it again.
+    '''
+
+    def __init__(self, cache, name: str, threshold=5, reset_timeout=60,
+                 exceptions=(Exception,)):
+        '''exceptions: The exceptions that count as failures.'''
+        self.cache = cache
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.exceptions = exceptions
+
+        self.failures_key = f'circuit:{name}:failures'
+        self.opened_key = f'circuit:{name}:opened'
+        self.trial_key = f'circuit:{name}:trial'
+
+    def allow(self) -> bool:
+        '''Checks whether a call may be attempted.'''
+        opened = self.cache.get(self.opened_key)
+
+        if opened is None:
+            return True
+
+        if time.time() - opened < self.reset_timeout:
+            return False
+
+        # Half-open: only a single trial call is let through
+        return self.cache.add(self.trial_key, True, self.reset_timeout)
+
+    def record_success(self):
+        self.cache.delete_many(
+            [self.failures_key, self.opened_key, self.trial_key]
+        )
+
+    def record_failure(self):
+        # Failures are only consecutive within the reset timeout
+        self.cache.add(self.failures_key, 0, self.reset_timeout)
+        try:
+            failures = self.cache.incr(self.failures_key)
+        except ValueError:
+            # The counter expired in the meantime
+            failures = 1
+
+        # A failed trial call opens the circuit again
+        if failures >= self.threshold or \
+                self.cache.get(self.opened_key) is not None:
+            self.cache.set(self.opened_key, time.time(), None)
+            self.cache.delete(self.trial_key)
+
+    def call(self, function, *args, **kwargs):
+        '''Calls the given function unless the circuit is open.'''
+        if not self.allow():
+            raise CircuitOpenError('The circuit is open.')
+
+        try:
+            result = function(*args, **kwargs)
+        except self.exceptions:
+            self.record_failure()
+            raise
+
+        self.record_success()
+        return result
@@ -1,7 +1,9 @@
+import hashlib
 import json
-import requests
 from abc import ABC, abstractmethod
 
+from .http import get_http_client
+
 
 class DirectionsService(ABC):
     '''Handles direction provision.'''
@@ -21,9 +23,10 @@ class ORSDirectionsService(DirectionsService):
     the [Open Route Service](https://openrouteservice.org/).
     '''
 
-    def __init__(self, api_key):
+    def __init__(self, api_key, client=None):
         self.api_key = api_key
         self.base_url = 'https://api.openrouteservice.org/v2'
+        self.client = client or get_http_client()
 
     def get_directions(
         self, points: list, profile: str = 'foot-walking'
@@ -45,7 +48,7 @@ class ORSDirectionsService(DirectionsService):
             'Content-Type': 'application/json'
         }
 
-        response = requests.post(
+        response = self.client.post(
             f'{self.base_url}{endpoint}', data=payload, headers=headers
         )
 
@@ -53,3 +56,53 @@ class ORSDirectionsService(DirectionsService):
 
         return route['geometry'], route['summary']['distance'],\
             route['summary']['duration']
+
+
+class CachedDirectionsService(DirectionsService):
+    '''
+    Caches the directions provided by another DirectionsService,
+    keyed on the profile and the waypoints rounded to a given precision.
+    '''
+
+    def __init__(self, service: DirectionsService, cache, precision=5,
+                 timeout=None):
+        '''
+        cache: A Django cache, which also bounds the number of entries.
+        precision: The number of decimals the coordinates are rounded to.
+        timeout: The cache TTL in seconds (the cache's default if None).
+        '''
+        self.service = service
+        self.cache = cache
+        self.precision = precision
+        self.timeout = timeout
+
+    def get_key(self, points: list, profile: str) -> str:
+        '''Builds the cache key of a directions request.'''
+        waypoints = [
+            [round(float(coordinate), self.precision) for coordinate in point]
+            for point in points
+        ]
+
+        digest = hashlib.md5(json.dumps(waypoints).encode()).hexdigest()
+        return f'directions:{profile}:{digest}'
+
+    def get_directions(
+        self, points: list, profile: str = 'foot-walking'
+    ) -> tuple:
+        '''
+        Provides a directions and summary information for the
+        best route that passes through the provided set of points.
+        '''
+        key = self.get_key(points, profile)
+
+        directions = self.cache.get(key)
+
+        if directions is None:
+            directions = self.service.get_directions(points, profile=profile)
+
+            if self.timeout is None:
+                self.cache.set(key, directions)
+            else:
+                self.cache.set(key, directions, timeout=self.timeout)
+
+        return tuple(directions)
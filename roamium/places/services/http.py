@@ -0,0 +1,116 @@
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HostLatency:
+    '''Latency statistics of the requests sent to a host.'''
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, latency: float):
+        self.count += 1
+        self.total += latency
+        self.min = latency if self.min is None else min(self.min, latency)
+        self.max = latency if self.max is None else max(self.max, latency)
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'average': self.average,
+            'min': self.min,
+            'max': self.max
+        }
+
+
+class HTTPClient:
+    '''
+    A keep-alive HTTP client with connection pooling and timeouts,
+    which keeps per host latency statistics.
+    '''
+
+    def __init__(self, connect_timeout=3.05, read_timeout=20,
+                 pool_size=4):
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        self.session.headers['Accept-Encoding'] = 'gzip'
+
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.latency = {}
+
+    def request(self, method: str, url: str, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).hostname
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        finally:
+            latency = time.perf_counter() - start
+            stats = self.latency.setdefault(host, HostLatency())
+            stats.add(latency)
+
+            logger.info(
+                '%s %s in %.1fms (average %.1fms over %d requests)',
+                method, host, latency * 1000,
+                stats.average * 1000, stats.count
+            )
+
+        return response
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> dict:
+        '''Returns the latency statistics of every host.'''
+        return {host: stats.as_dict() for host, stats in self.latency.items()}
+
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    '''
+    Returns the HTTP client of the current worker process.
+    Connections are not shared between processes, so a new client
+    is created after a fork.
+    '''
+    pid = os.getpid()
+
+    if pid not in _clients:
+        with _lock:
+            if pid not in _clients:
+                _clients.clear()
+                _clients[pid] = HTTPClient(
+                    connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+                    read_timeout=settings.HTTP_READ_TIMEOUT,
+                    pool_size=settings.HTTP_POOL_SIZE
+                )
+
+    return _clients[pid]
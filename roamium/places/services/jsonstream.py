@@ -0,0 +1,125 @@
+import codecs
+import json
+
+WHITESPACE = ' \t\n\r'
+
+# The characters that may follow a value in a valid document
+DELIMITERS = WHITESPACE + ',:]}'
+
+
+class JSONStream:
+    '''
+    Parses a JSON document from an iterable of byte chunks, keeping
+    only the unparsed part of the current chunk and the value being
+    parsed in memory.
+    '''
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+
+    def fill(self) -> bool:
+        '''Reads the next chunk. Returns False at the end of the document.'''
+        for chunk in self.chunks:
+            text = self.text_decoder.decode(chunk)
+
+            if text:
+                self.buffer = self.buffer[self.position:] + text
+                self.position = 0
+                return True
+
+        return False
+
+    def error(self, message):
+        return json.JSONDecodeError(message, self.buffer, self.position)
+
+    def peek(self) -> str:
+        '''Returns the next non-whitespace character without consuming it.'''
+        while True:
+            while self.position < len(self.buffer) and \
+                    self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+
+            if not self.fill():
+                raise self.error('Unexpected end of document')
+
+    def expect(self, characters: str) -> str:
+        '''Consumes the next non-whitespace character, if expected.'''
+        character = self.peek()
+
+        if character not in characters:
+            raise self.error(f'Expected one of {characters!r}')
+
+        self.position += 1
+        return character
+
+    def value(self):
+        '''Parses the next value.'''
+        self.peek()
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(
+                    self.buffer, self.position
+                )
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+
+            # A value that is not followed by a delimiter may continue
+            # in the next chunk (e.g. the digits of a number)
+            if (end == len(self.buffer) or
+                    self.buffer[end] not in DELIMITERS) and self.fill():
+                continue
+
+            self.position = end
+            return value
+
+
+def iter_array(chunks, key: str, siblings: dict = None):
+    '''
+    Yields the items of the array under the given key of the
+    top-level JSON object, parsing them one at a time from the
+    given byte chunks. Nothing is yielded if the key is missing.
+
+    The whole object is parsed, so a truncated document raises an
+    error even after the last item. The values of the other keys,
+    such as the remarks that follow the array, are stored in the
+    given siblings dictionary once all the items have been consumed.
+    '''
+    stream = JSONStream(chunks)
+    stream.expect('{')
+
+    if stream.peek() == '}':
+        return
+
+    while True:
+        name = stream.value()
+        stream.expect(':')
+
+        if name == key:
+            stream.expect('[')
+
+            if stream.peek() == ']':
+                stream.expect(']')
+            else:
+                while True:
+                    yield stream.value()
+
+                    if stream.expect(',]') == ']':
+                        break
+        else:
+            value = stream.value()
+
+            if siblings is not None:
+                siblings[name] = value
+
+        if stream.expect(',}') == '}':
+            return
@@ -0,0 +1,71 @@
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+from django.db.models import Q
+
+from routes.models import PlaceRating
+
+Rating = namedtuple('Rating', ('stars', 'count'))
+
+
+class RatingService(ABC):
+    '''Handles place rating provision.'''
+
+    @abstractmethod
+    def get_ratings(self, places: list) -> dict:
+        '''
+        Provides the ratings of the given places.
+
+        places: A list of (place_source, place_id) pairs.
+
+        Returns a dictionary mapping each rated (place_source, place_id)
+        pair to its Rating. Places without reviews are omitted.
+        '''
+        pass
+
+    def get_rating(self, place_source: str, place_id: int) -> Rating:
+        '''Provides the rating of a single place.'''
+        return self.get_ratings([(place_source, place_id)]).get(
+            (place_source, place_id), Rating(None, 0)
+        )
+
+
+def places_query(places: list, prefix: str = '') -> Q:
+    '''
+    Builds a filter matching the given (place_source, place_id) pairs
+    on the place_source and place_id fields under the given prefix.
+    '''
+    # Group the place ids by source
+    place_ids = {}
+    for place_source, place_id in places:
+        place_ids.setdefault(place_source, set()).add(place_id)
+
+    query = Q()
+    for place_source, ids in place_ids.items():
+        query |= Q(**{
+            f'{prefix}place_source': place_source,
+            f'{prefix}place_id__in': ids
+        })
+
+    return query
+
+
+class PlaceRatingService(RatingService):
+    '''
+    Handles place rating provision by reading the
+    denormalized place ratings that are kept up to date on review writes.
+    '''
+
+    def get_ratings(self, places: list) -> dict:
+        if not places:
+            return {}
+
+        ratings = PlaceRating.objects.filter(
+            places_query(places), review_count__gt=0
+        )
+
+        return {
+            (rating.place_source, rating.place_id):
+                Rating(rating.stars, rating.review_count)
+            for rating in ratings
+        }
@@ -1,19 +1,69 @@
 from abc import ABC, abstractmethod
 
-from sklearn.feature_extraction.text import CountVectorizer
-from scipy.spatial import distance
-import pandas as pd
-import json
+import numpy as np
+
+from ..candidates import CandidateSet, to_float
+from ..vocabulary import CategoryVocabulary
+
+WHEELCHAIR_VALUES = {'no': -1, 'limited': 1, 'yes': 2}
+WHEELCHAIR_LABELS = {-1: 'no', 0: None, 1: 'limited', 2: 'yes'}
+
+
+def cosine_similarity(u, v, w=None) -> np.ndarray:
+    '''
+    Calculates the (weighted) cosine similarity between the vector u
+    and each of the rows of the matrix v, in the same way as
+    `1 - scipy.spatial.distance.cosine(u, row, w)` would for every row.
+    '''
+    w = np.ones(v.shape[1]) if w is None else np.asarray(w, dtype=float)
+
+    uv = v @ (w * u)
+    uu = np.sum(w * u * u)
+    vv = (v * v) @ w
+
+    # The similarity of zero vectors is undefined (nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.clip(uv / np.sqrt(uu * vv), -1.0, 1.0)
+
+
+def top_k(scores, limit=None, offset=0) -> np.ndarray:
+    '''
+    Returns the indices of the highest scores in descending order,
+    skipping the first `offset` and returning at most `limit` of them.
+    Undefined (nan) scores are ranked last.
+    '''
+    keys = -np.where(np.isnan(scores), -np.inf, scores)
+    end = len(keys) if limit is None else min(offset + limit, len(keys))
+
+    if end <= offset:
+        return np.array([], dtype=int)
+
+    # Only the top `end` scores need to be sorted
+    if end < len(keys):
+        indices = np.argpartition(keys, end - 1)[:end]
+    else:
+        indices = np.arange(len(keys))
+
+    indices = indices[np.argsort(keys[indices], kind='stable')]
+
+    return indices[offset:end]
 
 
 class RecommendationService(ABC):
     '''Handles the place recommendation logic.'''
 
     @abstractmethod
-    def recommend(self, places: list, user_features: dict) -> list:
+    def recommend(
+        self, places: CandidateSet, user_features: dict, limit=None, offset=0
+    ) -> list:
         '''
         Recommends the most suitable places for a user
         based on the provided criteria.
+
+        places: The CandidateSet of the places to rank.
+
+        limit: The maximum number of places to return (all by default).
+        offset: The number of top places to skip.
         '''
         pass
 
@@ -23,101 +73,128 @@ class CosineSimilarityRecommendationService(RecommendationService):
     Handles the place recommendation logic using weighted cosine similarity.
     '''
 
-    def __init__(self, weights):
+    def __init__(self, weights, vocabulary=None):
+        '''
+        vocabulary: An optional shared CategoryVocabulary. When provided,
+        the category feature vectors are built as a sparse matrix over it,
+        instead of tokenizing into a new vocabulary on every recommendation.
+        '''
         self.weights = weights
+        self.vocabulary = vocabulary
 
-    def __preprocess(self, df, wheelchair) -> pd.DataFrame:
-        '''Handles place data preprocessing.'''
-
-        # Map wheelchair values to numbers
-        df['wheelchair'] = df['wheelchair'].map(
-            {'no': -1, 'limited': 1, 'yes': 2}
-        ).fillna(0)
-
-        # Prune places without wheelchair access
-        if wheelchair > 0:
-            df = df[df['wheelchair'] >= 0]
+    def __vectorize(self, category_names: list, user_categories: list):
+        '''
+        Tokenizes the given category names.
 
-        return df
+        Returns a sparse (category_names x tokens) matrix with the token
+        counts of each category and the user's token feature vector.
+        '''
+        # Without a shared vocabulary, the tokens are only counted
+        # for the given categories, like a new CountVectorizer would
+        vocabulary = self.vocabulary
+        if vocabulary is None:
+            vocabulary = CategoryVocabulary()
+
+        matrix = vocabulary.transform(
+            [[category] for category in category_names]
+        )
+        return matrix, vocabulary.vector(
+            user_categories, size=matrix.shape[1]
+        )
 
     def __calculate_category_similarity(
-        self, place_categories: pd.Series, user_categories: list
-    ) -> pd.Series:
+        self, places: CandidateSet, rows: np.ndarray, user_categories: list
+    ) -> np.ndarray:
         '''
-        Calculates the category similarities for a given set of places.
+        Calculates the category similarities for the places at the given
+        rows with a single sparse matrix-vector product.
 
         user_categories: A list containing the categories selected by the user.
         '''
-        combined_categories = place_categories.apply(lambda row: ' '.join(row))
-
-        # Calculate the place category feature vectors
-        cv = CountVectorizer()
-        count_array = cv.fit_transform(combined_categories).toarray()
-
-        categories = cv.get_feature_names_out()
-        place_feature_vectors = pd.DataFrame(count_array, columns=categories)
-
-        # Calculate the user category feature vectors
-        user_feature_vector = pd.DataFrame(columns=categories)
-        user_feature_vector.loc[0] = [
-            int(category in user_categories) for category in categories
-        ]
-
-        # Return the cosine similarity between the user's
-        # category feature vector and each of the place feature vectors.
-        return place_feature_vectors.apply(
-            lambda vector: 1 - distance.cosine(
-                vector, user_feature_vector.squeeze()
-            ),
-            axis=1
+        # Calculate the place category feature vectors,
+        # tokenizing each distinct category only once
+        token_matrix, user_feature_vector = self.__vectorize(
+            places.category_names, user_categories
         )
-
-    def recommend(self, places: list, user_features: dict) -> list:
+        place_feature_vectors = places.category_matrix(rows) @ token_matrix
+
+        # Limit the user category feature vector to the categories
+        # of the given places, like a freshly fitted vectorizer
+        present = np.zeros(token_matrix.shape[1], dtype=bool)
+        present[place_feature_vectors.indices] = True
+        user_feature_vector *= present
+
+        uv = place_feature_vectors @ user_feature_vector
+        uu = user_feature_vector @ user_feature_vector
+        vv = np.asarray(
+            place_feature_vectors.multiply(place_feature_vectors).sum(axis=1)
+        ).ravel()
+
+        # The similarity of zero vectors is undefined (nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.clip(uv / np.sqrt(uu * vv), -1.0, 1.0)
+
+    def recommend(
+        self, places: CandidateSet, user_features: dict, limit=None, offset=0
+    ) -> list:
         '''
         Recommends the most suitable places for a user
         based on the provided criteria.
+
+        places: The CandidateSet of the places to rank.
+        limit: The maximum number of places to return (all by default).
+        offset: The number of top places to skip.
         '''
         wheelchair = user_features.get('wheelchair', 0)
 
-        df = self.__preprocess(pd.DataFrame(places), wheelchair)
+        # Map wheelchair values to numbers
+        wheelchair_values = np.array([
+            WHEELCHAIR_VALUES.get(value, 0) for value in places.wheelchair
+        ], dtype=int)
+
+        rows = np.arange(len(places))
+
+        # Prune places without wheelchair access
+        if wheelchair > 0:
+            rows = rows[wheelchair_values >= 0]
+
+        if not len(rows):
+            return []
 
         # Category Score
-        df['category_similarity'] = self.__calculate_category_similarity(
-            df['categories'], user_features.get('categories', [])
+        category_similarity = self.__calculate_category_similarity(
+            places, rows, user_features.get('categories', [])
         )
 
-        # Calculate the final feature vector
-        features = df[
-            ['id', 'category_similarity', 'wheelchair', 'distance', 'rating']
-        ].copy()
-
-        max_distance = features['distance'].max() - 0.000001
-        features['distance'] = 1 - (features['distance'] / max_distance)
-
-        features['rating'].fillna(0, inplace=True)
-
-        # Use the feature vector to calculate a score for each place
-        df['score'] = features.apply(
-            lambda v: 1 - distance.cosine(
-                # Ideal vector
-                [1.0, wheelchair, 1.0, 1.0],
-
-                # Place vector
-                [
-                    10*v['category_similarity'],
-                    v['wheelchair'],
-                    v['distance'],
-                    v['rating'] / 5.0
-                ],
-                w=self.weights
-            ), axis=1
+        # Calculate the final feature vectors
+        wheelchair_values = wheelchair_values[rows]
+        distance = places.distances[rows]
+        max_distance = distance.max() - 0.000001
+
+        features = np.column_stack((
+            10 * category_similarity,
+            wheelchair_values,
+            1 - (distance / max_distance),
+            np.nan_to_num(places.ratings[rows]) / 5.0
+        ))
+
+        # Use the feature vectors to calculate a score for each place
+        scores = cosine_similarity(
+            np.array([1.0, wheelchair, 1.0, 1.0]),  # Ideal vector
+            features,
+            w=self.weights
         )
 
-        # Sort places by score
-        df.sort_values(by=['score'], ascending=[False], inplace=True)
-
-        df['wheelchair'] = df['wheelchair'].map(
-            {-1: 'no', 0: None, 1: 'limited', 2: 'yes'}
+        # Only the returned places are ranked and serialized
+        top = top_k(scores, limit, offset)
+
+        return places.to_records(
+            rows[top],
+            wheelchair=[
+                WHEELCHAIR_LABELS[value] for value in wheelchair_values[top]
+            ],
+            category_similarity=[
+                to_float(value) for value in category_similarity[top]
+            ],
+            score=[to_float(value) for value in scores[top]]
         )
-
-        return json.loads(df.to_json(orient='records'))
@@ -0,0 +1,105 @@
+import hashlib
+import time
+import uuid
+
+MISSING = object()
+
+
+class SingleFlightTimeout(Exception):
+    '''Raised when the call being waited for does not finish in time.'''
+    pass
+
+
+class SingleFlight:
+    '''
+    Coalesces identical calls that run at the same time, even across
+    worker processes, through a lock in a shared cache.
+
+    The first caller acquires the lock and runs the call, which is
+    expected to store its result somewhere the others can load it from
+    (e.g. a cache), while the others wait for it to end and load the
+    result instead of repeating the call. Only errors are shared
+    through the lock's cache, so that the waiting callers fail with
+    the same error instead of calling again.
+    '''
+
+    def __init__(self, cache, prefix: str, timeout=30, poll_interval=0.1,
+                 max_poll_interval=1.0):
+        '''
+        timeout: The maximum number of seconds a call is expected to take.
+        Waiting callers raise SingleFlightTimeout after that.
+
+        poll_interval: The initial number of seconds between the checks
+        of the lock, which is doubled up to max_poll_interval.
+        '''
+        self.cache = cache
+        self.prefix = prefix
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+
+    def lock_key(self, name: str) -> str:
+        digest = hashlib.md5(name.encode()).hexdigest()
+        return f'{self.prefix}:lock:{digest}'
+
+    def error_key(self, flight: str) -> str:
+        return f'{self.prefix}:error:{flight}'
+
+    def do(self, name: str, function, load):
+        '''
+        Returns the result of calling function, unless a concurrent
+        call with the same name is running, in which case the result
+        of load is returned once that call has ended (or the error it
+        raised is raised).
+
+        load: Returns the result stored by the function, or MISSING
+        if it can not be found, in which case the function is called.
+        '''
+        lock_key = self.lock_key(name)
+        deadline = time.monotonic() + self.timeout
+
+        while time.monotonic() < deadline:
+            flight = uuid.uuid4().hex
+
+            if self.cache.add(lock_key, flight, self.timeout):
+                try:
+                    return function()
+                except Exception as error:
+                    # The waiting callers fail instead of calling again
+                    self.cache.set(self.error_key(flight), error, self.timeout)
+                    raise
+                finally:
+                    self.cache.delete(lock_key)
+
+            flight = self._wait(lock_key, deadline)
+            if flight is None:
+                continue
+
+            error = self.cache.get(self.error_key(flight))
+            if error is not None:
+                raise error
+
+            result = load()
+            if result is not MISSING:
+                return result
+
+        # The function is not called again while a call may be running
+        raise SingleFlightTimeout(f'Waited too long for {name!r}.')
+
+    def _wait(self, lock_key: str, deadline: float):
+        '''
+        Waits for the flight holding the lock to end, polling the lock
+        less and less often. Returns the ended flight, or None if there
+        was none or it is still running at the deadline.
+        '''
+        flight = self.cache.get(lock_key)
+        interval = self.poll_interval
+
+        while flight is not None and time.monotonic() < deadline:
+            time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+            interval = min(interval * 2, self.max_poll_interval)
+
+            if self.cache.get(lock_key) != flight:
+                return flight
+
+        return None
@@ -0,0 +1,56 @@
+from django.db.models.signals import pre_save, post_save, post_delete, \
+    m2m_changed
+from django.dispatch import receiver
+
+from .models import Place, Category, OSMPlace
+from .histograms import LocalCategoryHistograms, invalidate_histograms
+
+
+@receiver(pre_save, sender=Place)
+def store_previous_location(sender, instance, **kwargs):
+    '''Keep the location of the place before it gets updated.'''
+    instance._previous_location = Place.objects.filter(
+        pk=instance.pk
+    ).values_list('location', flat=True).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_delete, sender=Place)
+def invalidate_place_tile(sender, instance, **kwargs):
+    '''Invalidate the category histograms of the place's tiles.'''
+    LocalCategoryHistograms().invalidate(
+        getattr(instance, '_previous_location', None), instance.location
+    )
+
+
+@receiver(m2m_changed, sender=Place.categories.through)
+def invalidate_place_categories(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    '''Invalidate the category histograms of the recategorized places.'''
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        locations = [instance.location]
+    elif pk_set is None:
+        # All the places of the category were cleared
+        return invalidate_histograms()
+    else:
+        locations = Place.objects.filter(
+            pk__in=pk_set
+        ).values_list('location', flat=True)
+
+    LocalCategoryHistograms().invalidate(*locations)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=OSMPlace)
+@receiver(post_delete, sender=OSMPlace)
+@receiver(m2m_changed, sender=OSMPlace.categories.through)
+def invalidate_all_tiles(sender, **kwargs):
+    '''
+    Invalidate the category histograms of every tile, since category
+    names and the categories of OSM places are not bound to a tile.
+    '''
+    invalidate_histograms()
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from unittest.mock import MagicMock, patch
+import time
+
+from places.services.circuitbreaker import CircuitBreaker, CircuitOpenError
+
+
+class CircuitBreakerTest(TestCase):
+    '''Tests for the circuit breaker'''
+
+    def setUp(self):
+        cache.clear()
+        self.circuit_breaker = CircuitBreaker(
+            cache, 'test', threshold=2, reset_timeout=60
+        )
+
+    def fail(self, times=1):
+        function = MagicMock(side_effect=ValueError('Test'))
+
+        for _ in range(times):
+            with self.assertRaises(ValueError):
+                self.circuit_breaker.call(function)
+
+    def test_circuit_opens(self):
+        '''Test that calls fail fast after repeated failures'''
+        self.fail(2)
+
+        function = MagicMock()
+        with self.assertRaises(CircuitOpenError):
+            self.circuit_breaker.call(function)
+
+        function.assert_not_called()
+
+    def test_success_resets_failures(self):
+        '''Test that only consecutive failures open the circuit'''
+        self.fail()
+        self.circuit_breaker.call(MagicMock())
+        self.fail()
+
+        self.assertTrue(self.circuit_breaker.allow())
+
+    def test_trial_call_closes_circuit(self):
+        '''Test that a successful trial call closes the circuit'''
+        self.fail(2)
+
+        with patch('time.time', return_value=time.time() + 61):
+            # Test that a single trial call is let through
+            self.assertTrue(self.circuit_breaker.allow())
+            self.assertFalse(self.circuit_breaker.allow())
+
+            self.circuit_breaker.record_success()
+
+        self.assertTrue(self.circuit_breaker.allow())
+
+    def test_failed_trial_call_opens_circuit(self):
+        '''Test that a failed trial call opens the circuit again'''
+        self.fail(2)
+
+        with patch('time.time', return_value=time.time() + 61):
+            self.fail()
+
+        self.assertFalse(self.circuit_breaker.allow())
@@ -0,0 +1,49 @@
+from django.core.cache import caches
+from django.test import TestCase
+
+from unittest.mock import MagicMock
+
+from places.services.directions import CachedDirectionsService
+
+DIRECTIONS = ('geometry', 1.5, 1200.0)
+
+
+class CachedDirectionsServiceTest(TestCase):
+    '''Tests for the directions cache'''
+
+    def setUp(self):
+        caches['directions'].clear()
+
+        self.service = MagicMock()
+        self.service.get_directions.return_value = DIRECTIONS
+
+        self.cached_service = CachedDirectionsService(
+            self.service, caches['directions'], precision=4
+        )
+
+    def test_repeated_directions_cached(self):
+        '''Test that repeated requests do not call the service again'''
+        points = [[23.72751, 37.98381], [23.73001, 37.97512]]
+
+        for _ in range(2):
+            self.assertEquals(
+                self.cached_service.get_directions(points), DIRECTIONS
+            )
+
+        self.service.get_directions.assert_called_once()
+
+    def test_rounded_waypoints_share_cache(self):
+        '''Test that waypoints within the precision share the same entry'''
+        self.cached_service.get_directions([[23.72751, 37.98381]])
+        self.cached_service.get_directions([[23.72753, 37.98379]])
+
+        self.service.get_directions.assert_called_once()
+
+    def test_profiles_cached_separately(self):
+        '''Test that different profiles do not share cache entries'''
+        points = [[23.72751, 37.98381], [23.73001, 37.97512]]
+
+        self.cached_service.get_directions(points, profile='foot-walking')
+        self.cached_service.get_directions(points, profile='cycling-regular')
+
+        self.assertEquals(self.service.get_directions.call_count, 2)
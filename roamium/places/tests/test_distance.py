@@ -0,0 +1,37 @@
+from django.test import TestCase
+
+import numpy as np
+
+from places.distance import haversine_distances, within_radius
+
+
+class DistanceTest(TestCase):
+    '''Tests for the vectorized distance calculations'''
+
+    def test_haversine_distances(self):
+        '''Test the distances to points in every direction'''
+        distances = haversine_distances(
+            23.7, 37.9, [23.7, 24.7, 23.7, 23.7], [38.9, 37.9, 37.9, 36.9]
+        )
+
+        # A degree of latitude is ~111.2km everywhere, while
+        # a degree of longitude shrinks away from the equator
+        np.testing.assert_allclose(
+            distances, [111195, 87700, 0, 111195], atol=100
+        )
+
+    def test_within_radius(self):
+        '''Test that only the elements within the radius are kept'''
+        elements = [
+            {'id': 1, 'lon': 0.001, 'lat': 0.001},
+            {'id': 2, 'lon': 0.01, 'lat': 0.0},
+            {'id': 3, 'lon': 0.0, 'lat': -0.004},
+        ]
+
+        self.assertEquals(
+            [element['id'] for element in within_radius(
+                0.0, 0.0, elements, 500
+            )],
+            [1, 3]
+        )
+        self.assertEquals(within_radius(0.0, 0.0, [], 500), [])
@@ -0,0 +1,148 @@
+from django.contrib.gis.geos import Point
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from unittest.mock import patch
+import time
+
+from places.histograms import LocalCategoryHistograms, \
+    OverpassCategoryHistograms
+from places.tiles import tile_for_point
+from places.tests.test_overpass import create_builder
+from shared.test_utils import create_test_place, create_test_category, \
+    create_test_element
+
+ZOOM = 15
+
+TILE = tile_for_point(0.001, 0.001, ZOOM)
+
+
+def create_tile_entry(*elements, fetched=None):
+    '''Create a cached tile entry with the given elements'''
+    return {
+        'elements': list(elements),
+        'fetched': time.time() if fetched is None else fetched
+    }
+
+
+class LocalCategoryHistogramsTest(TestCase):
+    '''Tests for the category histograms of the local places'''
+
+    def setUp(self):
+        cache.clear()
+        caches['tiles'].clear()
+        self.histograms = LocalCategoryHistograms(zoom=ZOOM)
+
+        self.place = create_test_place(
+            location={'latitude': 0.001, 'longitude': 0.001}
+        )
+        self.category = create_test_category(name='Test 1')
+        self.place.categories.add(self.category)
+
+    def test_places_counted_per_tile(self):
+        '''Test that the places of each category are counted per tile'''
+        other_place = create_test_place(
+            location={'latitude': 0.002, 'longitude': 0.002}
+        )
+        other_place.categories.add(self.category)
+
+        distant_place = create_test_place(
+            location={'latitude': 1.0, 'longitude': 1.0}
+        )
+        distant_place.categories.add(self.category)
+
+        self.assertEquals(self.histograms.get([TILE]), {'Test 1': 2})
+
+    def test_histograms_cached(self):
+        '''Test that cached histograms do not query the database'''
+        self.histograms.get([TILE])
+
+        with CaptureQueriesContext(connection) as queries:
+            histogram = self.histograms.get([TILE])
+
+        # The database cache may still be queried
+        self.assertFalse(any(
+            'places_place' in query['sql'] for query in queries
+        ))
+        self.assertEquals(histogram, {'Test 1': 1})
+
+    def test_categories_change_invalidates_tile(self):
+        '''Test that changing the categories of a place updates its tile'''
+        self.histograms.get([TILE])
+
+        self.place.categories.add(create_test_category(name='Test 2'))
+
+        self.assertEquals(
+            self.histograms.get([TILE]), {'Test 1': 1, 'Test 2': 1}
+        )
+
+    def test_moved_place_invalidates_tiles(self):
+        '''Test that moving a place updates both its old and new tile'''
+        new_tile = tile_for_point(1.0, 1.0, ZOOM)
+        self.histograms.get([TILE, new_tile])
+
+        self.place.location = Point(1.0, 1.0, srid=4326)
+        self.place.save()
+
+        self.assertEquals(self.histograms.get([TILE]), {})
+        self.assertEquals(self.histograms.get([new_tile]), {'Test 1': 1})
+
+    def test_category_rename_invalidates_tiles(self):
+        '''Test that renaming a category updates every tile'''
+        self.histograms.get([TILE])
+
+        self.category.name = 'Renamed'
+        self.category.save()
+
+        self.assertEquals(self.histograms.get([TILE]), {'Renamed': 1})
+
+
+@override_settings(OVERPASS_CACHE_TIMEOUT=60)
+class OverpassCategoryHistogramsTest(TestCase):
+    '''Tests for the category histograms of the Overpass places'''
+
+    def setUp(self):
+        cache.clear()
+        caches['tiles'].clear()
+
+    @patch('places.tiles.OverpassTileCache.get_tiles')
+    def test_histograms_built_from_tiles(self, get_tiles):
+        '''Test that the histograms are built from the cached tiles'''
+        get_tiles.return_value = {TILE: create_tile_entry(
+            create_test_element(1, 0.001, 0.001, amenity='cafe;bar'),
+            create_test_element(
+                2, 0.002, 0.002, amenity='cafe', cuisine='cafe'
+            ),
+        )}
+
+        histograms = OverpassCategoryHistograms(create_builder(), zoom=ZOOM)
+
+        # Test that each place is counted once per category
+        self.assertEquals(histograms.get([TILE]), {'cafe': 2, 'bar': 1})
+        self.assertEquals(histograms.freshness.status, 'fresh')
+
+        # Test that the tiles are only read once
+        histograms.get([TILE])
+        self.assertEquals(get_tiles.call_count, 1)
+
+    @patch('places.tiles.OverpassTileCache.get_tiles')
+    def test_stale_and_missing_tiles_not_cached(self, get_tiles):
+        '''Test that histograms of stale or missing tiles are rebuilt'''
+        stale_tile = tile_for_point(1.0, 1.0, ZOOM)
+        missing_tile = tile_for_point(2.0, 2.0, ZOOM)
+
+        get_tiles.return_value = {stale_tile: create_tile_entry(
+            create_test_element(1, 1.0, 1.0, amenity='cafe'),
+            fetched=time.time() - 120
+        )}
+
+        histograms = OverpassCategoryHistograms(create_builder(), zoom=ZOOM)
+
+        self.assertEquals(
+            histograms.get([stale_tile, missing_tile]), {'cafe': 1}
+        )
+
+        histograms.get([stale_tile, missing_tile])
+        self.assertEquals(get_tiles.call_count, 2)
@@ -0,0 +1,34 @@
+from django.test import TestCase, override_settings
+
+from unittest.mock import patch, MagicMock
+
+from places.services.http import HTTPClient, get_http_client
+
+
+class HTTPClientTest(TestCase):
+    '''Tests for the shared HTTP client'''
+
+    @patch('requests.Session.request', return_value=MagicMock())
+    def test_timeouts_applied(self, request):
+        '''Test that the configured timeouts are applied to every request'''
+        client = HTTPClient(connect_timeout=1, read_timeout=5)
+        client.post('https://example.com/api', data={'data': 'test'})
+
+        self.assertEquals(request.call_args.kwargs['timeout'], (1, 5))
+
+    @patch('requests.Session.request', return_value=MagicMock())
+    def test_latency_per_host(self, request):
+        '''Test that the latency of the requests is recorded per host'''
+        client = HTTPClient()
+        client.post('https://example.com/api')
+        client.post('https://example.com/api')
+        client.get('https://example.org/')
+
+        stats = client.stats()
+        self.assertEquals(stats['example.com']['count'], 2)
+        self.assertEquals(stats['example.org']['count'], 1)
+
+    @override_settings(HTTP_CONNECT_TIMEOUT=2, HTTP_READ_TIMEOUT=10)
+    def test_client_shared(self):
+        '''Test that the same client is reused within a process'''
+        self.assertIs(get_http_client(), get_http_client())
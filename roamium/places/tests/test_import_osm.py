@@ -0,0 +1,93 @@
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from unittest.mock import patch
+from io import StringIO
+
+from places.models import OSMNode
+from shared.test_utils import create_test_user, create_test_element
+import tempfile
+import json
+
+
+class ImportOSMTest(TestCase):
+    '''Tests for the import_osm command and the local OSM mirror'''
+
+    def import_elements(self, elements, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as dump:
+            json.dump({'elements': elements}, dump)
+            dump.flush()
+
+            call_command('import_osm', dump.name, *args, stdout=StringIO())
+
+    def test_import_filters_places(self):
+        '''Test that only the elements matching the place filters are kept'''
+        self.import_elements([
+            create_test_element(1, 0.001, 0.001, name='Cafe', amenity='cafe'),
+            create_test_element(2, 0.001, 0.001, name=None, amenity='cafe'),
+            create_test_element(3, 0.001, 0.001, name='Fuel', amenity='fuel'),
+            create_test_element(4, 0.001, 0.001, name='Bench', leisure='park'),
+            create_test_element(
+                5, 0.001, 0.001, name='Ruins', historic='ruins'
+            ),
+        ])
+
+        self.assertEquals(
+            sorted(OSMNode.objects.values_list('osm_id', flat=True)), [1, 5]
+        )
+
+    def test_import_replaces_nodes(self):
+        '''Test that importing an extract replaces the existing nodes'''
+        self.import_elements([
+            create_test_element(1, 0.001, 0.001, name='Cafe', amenity='cafe'),
+        ])
+        self.import_elements([
+            create_test_element(2, 0.001, 0.001, name='Bar', amenity='bar'),
+        ])
+
+        self.assertEquals(
+            list(OSMNode.objects.values_list('osm_id', flat=True)), [2]
+        )
+
+    def test_append_updates_nodes(self):
+        '''Test that appending updates the nodes that are imported again'''
+        self.import_elements([
+            create_test_element(1, 0.001, 0.001, name='Cafe', amenity='cafe'),
+            create_test_element(2, 0.001, 0.001, name='Bar', amenity='bar'),
+        ])
+        self.import_elements([
+            create_test_element(1, 0.002, 0.002, name='Pub', amenity='pub'),
+            create_test_element(3, 0.001, 0.001, name='Shop', shop='bakery'),
+        ], '--append')
+
+        nodes = {node.osm_id: node for node in OSMNode.objects.all()}
+
+        self.assertEquals(sorted(nodes), [1, 2, 3])
+        self.assertEquals(nodes[1].tags['name'], 'Pub')
+        self.assertEquals(nodes[1].location.x, 0.002)
+
+    @override_settings(OSM_PLACES_SOURCE='local')
+    @patch('places.overpass.QueryBuilder.fetch_elements')
+    def test_nearby_places_local_source(self, fetch_elements):
+        '''Test that nearby places are read from the local OSM mirror'''
+        self.import_elements([
+            create_test_element(1, 0.001, 0.001, name='Cafe', amenity='cafe'),
+            create_test_element(2, 0.1, 0.1, name='Bar', amenity='bar'),
+        ])
+
+        client = APIClient()
+        client.force_authenticate(create_test_user())
+
+        response = client.get(
+            reverse('place-nearby'), data={'latitude': 0.0, 'longitude': 0.0}
+        )
+
+        # Test that only the nearby node was returned
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals([place['id'] for place in response.data], [1])
+        self.assertIn('cafe', response.data[0]['categories'])
+
+        # Test that Overpass was not queried
+        fetch_elements.assert_not_called()
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.test import SimpleTestCase
+
+import subprocess
+import sys
+
+HEAVY_MODULES = ('pandas', 'sklearn', 'scipy')
+
+# Load the URL configuration like a worker does on startup
+BOOT_SCRIPT = f'''
+import django, sys
+django.setup()
+import {settings.ROOT_URLCONF}
+print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))
+'''
+
+
+class ImportsTest(SimpleTestCase):
+    '''Tests for the modules that are loaded on startup'''
+
+    def test_numeric_stack_not_imported_on_startup(self):
+        '''Test that pandas, sklearn and scipy are loaded lazily'''
+        result = subprocess.run(
+            [sys.executable, '-c', BOOT_SCRIPT],
+            capture_output=True, text=True, check=True
+        )
+
+        self.assertEquals(result.stdout.strip(), '')
@@ -0,0 +1,62 @@
+from django.test import TestCase
+
+import json
+
+from places.services.jsonstream import iter_array
+
+
+def chunked(data, size):
+    '''Split the given bytes into chunks of the given size'''
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class IterArrayTest(TestCase):
+    '''Tests for the incremental parsing of JSON arrays'''
+
+    def test_items_parsed(self):
+        '''Test that the items are parsed for any chunk size'''
+        document = {
+            'version': 0.6,
+            'osm3s': {'copyright': 'The data included "elements"'},
+            'elements': [
+                {'id': id, 'lat': 37.9 + id / 1000, 'lon': -23.7,
+                 'tags': {'name': f'Καφέ {id}'}}
+                for id in range(50)
+            ],
+            'remark': 'runtime error: Query timed out in "query" at line 1'
+        }
+        data = json.dumps(document, ensure_ascii=False).encode()
+
+        for size in (1, 3, 64, len(data)):
+            siblings = {}
+
+            self.assertEquals(
+                list(iter_array(chunked(data, size), 'elements', siblings)),
+                document['elements']
+            )
+
+            # Test that the keys around the array, including the
+            # remark that follows it, are not dropped
+            self.assertEquals(siblings, {
+                key: value for key, value in document.items()
+                if key != 'elements'
+            })
+
+    def test_missing_or_empty_array(self):
+        '''Test that nothing is yielded without items'''
+        for data in (b'{}', b'{"version": 0.6}', b'{"elements": [ ]}'):
+            self.assertEquals(list(iter_array([data], 'elements')), [])
+
+    def test_truncated_document(self):
+        '''Test that a truncated document raises an error'''
+        data = json.dumps({'elements': [1, 2, 3]}).encode()
+
+        with self.assertRaises(ValueError):
+            list(iter_array(chunked(data[:-5], 2), 'elements'))
+
+        # Test that the document is still parsed after the array
+        with self.assertRaises(ValueError):
+            list(iter_array([data[:-1] + b', "remark": "runti'], 'elements'))
+
+        with self.assertRaises(ValueError):
+            list(iter_array([b'<html>Too Many Requests</html>'], 'elements'))
@@ -0,0 +1,348 @@
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from unittest.mock import patch, MagicMock
+import json
+import requests
+import time
+
+from places.models import OSMPlace
+from places.overpass import QueryBuilder, normalize_element, is_place
+from places.tiles import OverpassTileCache, tile_for_point, tile_bounds, \
+    tiles_for_radius
+from shared.test_utils import create_test_category, create_test_element
+
+OSM_PLACE_TAGS = ('amenity', 'historic', 'tourism', 'shop')
+
+
+def mock_response(elements, remark=None):
+    '''Create a mocked, streamed Overpass response with the given elements'''
+    document = {'version': 0.6, 'elements': elements}
+
+    # Overpass reports the errors after the elements
+    if remark is not None:
+        document['remark'] = remark
+
+    body = json.dumps(document).encode()
+
+    response = MagicMock()
+    response.iter_content.side_effect = lambda chunk_size: (
+        body[i:i + chunk_size] for i in range(0, len(body), chunk_size)
+    )
+    return response
+
+
+def create_builder(longitude=0.0, latitude=0.0, radius=1000):
+    builder = QueryBuilder(longitude, latitude, radius=radius)
+
+    for tag in OSM_PLACE_TAGS:
+        builder.add_node(name=None, **{tag: None})
+
+    return builder
+
+
+EXCLUDED_AMENITIES = (
+    '[amenity!~"fuel|pharmacy|driving_school|kindergarten|veterinary|'
+    'clinic|bus_station|school|bank|post_office|car_wash|courthouse|'
+    'bureau_de_change|taxi|doctors|police"]'
+)
+
+
+@override_settings(OVERPASS_QUERY_TIMEOUT=15, OVERPASS_QUERY_MAXSIZE=1024)
+class QueryCompilerTest(TestCase):
+    '''Golden tests for the compiled Overpass queries'''
+
+    def test_place_nodes_combined(self):
+        '''Test that the nodes of every place tag share a single scan'''
+        self.assertEquals(
+            create_builder(23.7, 37.9, radius=500).query,
+            '[out:json][timeout:15][maxsize:1024];('
+            'node[name][~"^(amenity|historic|tourism|shop)$"~"."]'
+            + EXCLUDED_AMENITIES + '(around:500,37.9,23.7);'
+            ');'
+            'convert node ::id=id(),::geom=geom(),'
+            'name=t["name"],wheelchair=t["wheelchair"],'
+            'amenity=t["amenity"],shop=t["shop"],cuisine=t["cuisine"],'
+            'alcohol=t["alcohol"],leisure=t["leisure"],club=t["club"],'
+            'historic=t["historic"],tourism=t["tourism"];'
+            'out center qt;'
+        )
+
+    def test_area(self):
+        '''Test that the query can be compiled for a bounding box'''
+        builder = QueryBuilder(0.0, 0.0, output_tags=None)
+        builder.add_node(name=None, amenity=None)
+
+        self.assertEquals(
+            builder.compile('1.0,2.0,3.0,4.0'),
+            '[out:json][timeout:15][maxsize:1024];('
+            'node[name][amenity]' + EXCLUDED_AMENITIES + '(1.0,2.0,3.0,4.0);'
+            ');out center qt;'
+        )
+
+    def test_nodes_not_combined(self):
+        '''
+        Test that only the nodes that differ in a tag that needs to exist
+        are combined, along with the nodes that are fetched by id
+        '''
+        builder = QueryBuilder(23.7, 37.9, radius=500, output_tags=None)
+        builder.add_node(amenity='cafe')
+        builder.add_node(amenity='cafe', wifi=None)
+        builder.add_node(name=None, shop=None)
+        builder.add_node_by_id(42)
+
+        self.assertEquals(
+            builder.query,
+            '[out:json][timeout:15][maxsize:1024];('
+            'node[amenity=cafe]' + EXCLUDED_AMENITIES +
+            '(around:500,37.9,23.7);'
+            'node[name][shop]' + EXCLUDED_AMENITIES +
+            '(around:500,37.9,23.7);'
+            'node(42);'
+            ');out center qt;'
+        )
+
+    def test_normalize_element(self):
+        '''Test that every output format is converted to a node'''
+        node = {
+            'type': 'node', 'id': 1, 'lon': 1.5, 'lat': 2.5,
+            'tags': {'name': 'Test'}
+        }
+
+        for element in (
+            node,
+            dict(node, id='1', tags={'name': 'Test', 'wheelchair': ''}),
+            {
+                'type': 'node', 'id': 1, 'tags': {'name': 'Test'},
+                'geometry': {'type': 'Point', 'coordinates': [1.5, 2.5]}
+            },
+            {
+                'type': 'way', 'id': 1, 'tags': {'name': 'Test'},
+                'center': {'lat': 2.5, 'lon': 1.5}
+            },
+        ):
+            self.assertEquals(normalize_element(element), node)
+
+
+class TilesTest(TestCase):
+    '''Tests for the slippy map tile helpers'''
+
+    def test_tile_contains_point(self):
+        '''Test that a point is within the bounds of its tile'''
+        x, y = tile_for_point(23.7275, 37.9838, 15)
+        south, west, north, east = tile_bounds(x, y, 15)
+
+        self.assertTrue(south <= 37.9838 <= north)
+        self.assertTrue(west <= 23.7275 <= east)
+
+    def test_tiles_cover_radius(self):
+        '''Test that the tiles cover the whole search area'''
+        tiles = tiles_for_radius(23.7275, 37.9838, 1000, 15)
+
+        # The corners of the bounding box must be covered
+        for longitude, latitude in ((23.7163, 37.9749), (23.7387, 37.9927)):
+            self.assertIn(tile_for_point(longitude, latitude, 15), tiles)
+
+
+@override_settings(OVERPASS_CACHE_TIMEOUT=60)
+class OverpassTileCacheTest(TestCase):
+    '''Tests for the tile-keyed Overpass cache'''
+
+    def setUp(self):
+        cache.clear()
+        caches['tiles'].clear()
+
+    @patch('places.services.http.HTTPClient.post')
+    def test_cached_tiles_are_reused(self, post):
+        '''Test that overlapping queries do not query Overpass again'''
+        post.return_value = mock_response([
+            create_test_element(1, 0.001, 0.001, amenity='cafe')
+        ])
+
+        places = create_builder().run_query()
+        nearby_places = create_builder(0.0002, 0.0002).run_query()
+
+        # Test that Overpass was queried only once
+        self.assertEquals(post.call_count, 1)
+
+        self.assertEquals(list(places.ids), [1])
+        self.assertEquals(list(nearby_places.ids), [1])
+
+    @patch('places.services.http.HTTPClient.post')
+    def test_elements_outside_radius_are_excluded(self, post):
+        '''Test that cached elements outside the radius are not returned'''
+        post.return_value = mock_response([
+            create_test_element(1, 0.001, 0.001, amenity='cafe'),
+            create_test_element(2, 0.009, 0.0, amenity='bar'),
+        ])
+
+        places = create_builder(radius=500).run_query()
+
+        # Test that only the place within 500 meters was returned
+        self.assertEquals(list(places.ids), [1])
+
+    @patch('places.services.http.HTTPClient.post')
+    @override_settings(OVERPASS_CACHE_TIMEOUT=0)
+    def test_cache_disabled(self, post):
+        '''Test that every query reaches Overpass when caching is disabled'''
+        post.return_value = mock_response([])
+
+        create_builder().run_query()
+        create_builder().run_query()
+
+        self.assertEquals(post.call_count, 2)
+
+    @patch('places.tiles.OverpassTileCache.refresh_in_background')
+    @patch('places.services.http.HTTPClient.post')
+    def test_stale_tiles_served(self, post, refresh_in_background):
+        '''Test that stale tiles are served while they are refreshed'''
+        post.return_value = mock_response([
+            create_test_element(1, 0.001, 0.001, amenity='cafe')
+        ])
+
+        create_builder().run_query()
+
+        with patch('time.time', return_value=time.time() + 120):
+            builder = create_builder()
+            places = builder.run_query()
+
+        # Test that the stale tiles were served without querying Overpass
+        self.assertEquals(post.call_count, 1)
+        self.assertEquals(list(places.ids), [1])
+        self.assertEquals(builder.freshness.status, 'stale')
+        self.assertGreaterEqual(builder.freshness.age, 120)
+
+        # Test that a refresh of the stale tiles was started
+        refresh_in_background.assert_called_once()
+
+    @patch('places.services.http.HTTPClient.post')
+    def test_cached_tiles_served_when_unavailable(self, post):
+        '''Test that the cached tiles are served if Overpass fails'''
+        post.return_value = mock_response([
+            create_test_element(1, 0.001, 0.001, amenity='cafe')
+        ])
+
+        create_builder().run_query()
+
+        # Query a wider area while Overpass is unavailable
+        post.side_effect = requests.ConnectionError()
+        builder = create_builder(radius=3000)
+        places = builder.run_query()
+
+        self.assertEquals(list(places.ids), [1])
+        self.assertEquals(builder.freshness.status, 'unavailable')
+
+    @patch('places.services.http.HTTPClient.post')
+    def test_partial_response_not_cached(self, post):
+        '''Test that responses of queries that timed out are not cached'''
+        post.return_value = mock_response(
+            [create_test_element(1, 0.001, 0.001, amenity='cafe')],
+            remark='runtime error: Query timed out in "query" at line 1 '
+            'after 26 seconds.'
+        )
+
+        builder = create_builder()
+        places = builder.run_query()
+
+        self.assertEquals(len(places), 0)
+        self.assertEquals(builder.freshness.status, 'unavailable')
+
+        # Test that no tile was cached
+        tile_cache = OverpassTileCache(builder)
+        keys = [tile_cache.key(tile) for tile in tile_cache.tiles()]
+        self.assertEquals(caches['tiles'].get_many(keys), {})
+
+    @patch(
+        'places.services.http.HTTPClient.post',
+        side_effect=requests.ConnectionError()
+    )
+    @override_settings(OVERPASS_CIRCUIT_THRESHOLD=2)
+    def test_circuit_opens_after_failures(self, post):
+        '''Test that Overpass is not queried after repeated failures'''
+        for _ in range(4):
+            builder = create_builder()
+            places = builder.run_query()
+
+            self.assertEquals(len(places), 0)
+            self.assertEquals(builder.freshness.status, 'unavailable')
+
+        self.assertEquals(post.call_count, 2)
+
+
+@override_settings(OVERPASS_CHUNK_SIZE=16)
+class StreamElementsTest(TestCase):
+    '''Tests for the incremental parsing of Overpass responses'''
+
+    def setUp(self):
+        cache.clear()
+        caches['tiles'].clear()
+
+    @patch('places.services.http.HTTPClient.post')
+    def test_elements_filtered(self, post):
+        '''Test that the elements are filtered while they are parsed'''
+        post.return_value = mock_response([
+            create_test_element(1, 0.001, 0.001, amenity='cafe'),
+            create_test_element(2, 0.001, 0.001, name='', amenity='cafe'),
+            create_test_element(3, 0.001, 0.001, amenity='bank'),
+            create_test_element(4, 0.002, 0.002, tourism='museum'),
+        ])
+
+        builder = create_builder()
+        builder.element_filter = is_place
+
+        self.assertEquals(list(builder.run_query().ids), [1, 4])
+
+        # Test that the response was streamed
+        self.assertTrue(post.call_args.kwargs['stream'])
+
+
+class ProcessElementsTest(TestCase):
+    '''Tests for the conversion of OSM elements to places'''
+
+    def create_osm_places(self, count):
+        category = create_test_category(name='Test Category')
+        elements = []
+
+        for id in range(1, count + 1):
+            osm_place = OSMPlace.objects.create(
+                osm_id=str(id), name=f'Override {id}', wheelchair='yes'
+            )
+            osm_place.categories.add(category)
+
+            elements.append(
+                create_test_element(id, 0.001, 0.001, amenity='cafe')
+            )
+
+        return elements
+
+    def count_queries(self, elements):
+        with CaptureQueriesContext(connection) as context:
+            create_builder().process_elements(elements)
+
+        return len(context.captured_queries)
+
+    def test_osm_place_overrides(self):
+        '''Test that the mirrored OSM places overwrite the OSM data'''
+        elements = self.create_osm_places(1)
+
+        place = create_builder().process_elements(elements).to_records()[0]
+
+        self.assertEquals(place['name'], 'Override 1')
+        self.assertEquals(place['wheelchair'], 'yes')
+        self.assertEquals(place['categories'], ['Test Category', 'cafe'])
+
+        # Test that the distance is in meters
+        self.assertAlmostEqual(place['distance'], 157.25, places=1)
+
+    def test_queries_constant(self):
+        '''
+        Test that the number of queries does not depend
+        on the number of elements.
+        '''
+        few = self.count_queries(self.create_osm_places(2))
+        OSMPlace.objects.all().delete()
+        many = self.count_queries(self.create_osm_places(20))
+
+        self.assertEquals(few, many)
@@ -1,12 +1,18 @@
+from django.core.cache import cache, caches
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from unittest.mock import patch
+import requests
 
+from places.candidates import CandidateSet
 from places.models import Place
 from shared.test_utils import create_test_user, create_test_superuser, \
-    create_test_place, create_test_category, place_payload
+    create_test_place, create_test_category, create_test_route, \
+    create_test_visit, create_test_review, place_payload
 import json
 
 PLACES_URL = reverse('place-list')
@@ -32,6 +38,8 @@ class PlaceApiTest(TestCase):
 
     def setUp(self):
         self.client = APIClient()
+        cache.clear()
+        caches['tiles'].clear()
 
     def test_create_place_admin_user(self):
         '''Test that admin users can create places'''
@@ -294,7 +302,9 @@ class PlaceApiTest(TestCase):
         # Test that the response status code is 401
         self.assertEquals(response.status_code, 401)
 
-    @patch('places.overpass.QueryBuilder.run_query', return_value=[])
+    @patch(
+        'places.overpass.QueryBuilder.run_query', return_value=CandidateSet()
+    )
     def test_nearby_places_authenticated_user(self, *args):
         '''Test that authenticated users can fetch nearby places'''
         # Create and authenticate regular user
@@ -321,7 +331,63 @@ class PlaceApiTest(TestCase):
         self.assertEquals(response.data[0].get('id'), closest_place.id)
         self.assertEquals(response.data[-1].get('id'), furthest_place.id)
 
-    @patch('places.overpass.QueryBuilder.run_query', return_value=[])
+    @patch(
+        'places.overpass.QueryBuilder.run_query', return_value=CandidateSet()
+    )
+    def test_nearby_places_radius(self, *args):
+        '''Test that only the places within the radius are returned'''
+        self.authenticateRegularUser()
+
+        # Create places about 157, 314 and 1570 meters away
+        places = [
+            create_test_place(
+                location={'latitude': offset, 'longitude': offset}
+            )
+            for offset in (0.01, 0.002, 0.001)
+        ]
+
+        response = self.client.get(
+            reverse('place-nearby'),
+            data={'latitude': 0.0, 'longitude': 0.0, 'radius': 500}
+        )
+
+        # Test that the nearby places were returned sorted by distance
+        self.assertEquals(
+            [place['id'] for place in response.data],
+            [places[2].id, places[1].id]
+        )
+        self.assertLess(response.data[0]['distance'], 160)
+
+    @patch(
+        'places.services.http.HTTPClient.post',
+        side_effect=requests.ConnectionError()
+    )
+    def test_nearby_places_overpass_unavailable(self, *args):
+        '''
+        Test that the local places are returned while Overpass
+        is unavailable, along with the freshness of the OSM places
+        '''
+        cache.clear()
+        caches['tiles'].clear()
+        self.authenticateRegularUser()
+
+        place = create_test_place(
+            location={'latitude': 0.001, 'longitude': 0.001}
+        )
+
+        response = self.client.get(
+            reverse('place-nearby'), data={'latitude': 0.0, 'longitude': 0.0}
+        )
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(
+            [place['id'] for place in response.data], [place.id]
+        )
+        self.assertEquals(response['X-OSM-Freshness'], 'unavailable')
+
+    @patch(
+        'places.overpass.QueryBuilder.run_query', return_value=CandidateSet()
+    )
     def test_nearby_places_unauthenticated_user(self, *args):
         '''Test that unauthenticated users can not fetch nearby places'''
         response = self.client.get(
@@ -331,7 +397,9 @@ class PlaceApiTest(TestCase):
         # Test that the response status code is 401
         self.assertEquals(response.status_code, 401)
 
-    @patch('places.overpass.QueryBuilder.run_query', return_value=[])
+    @patch(
+        'places.overpass.QueryBuilder.run_query', return_value=CandidateSet()
+    )
     def test_nearby_places_invalid_parameters(self, *args):
         '''
         Test that the "latitude" and "longitude" parameters
@@ -371,7 +439,7 @@ class PlaceApiTest(TestCase):
         self.assertIn(category_1.name, response.data['categories'])
         self.assertIn(category_2.name, response.data['categories'])
 
-    @patch('places.overpass.QueryBuilder.run_query', return_value=[])
+    @patch('places.tiles.OverpassTileCache.get_tiles', return_value={})
     def test_nearby_categories(self, *args):
         '''
         Test that all the categories of the places
@@ -404,3 +472,123 @@ class PlaceApiTest(TestCase):
         # Test that both categories were returned in a list
         self.assertIn(category_1.name, response.data)
         self.assertIn(category_2.name, response.data)
+
+    @patch('places.tiles.OverpassTileCache.get_tiles', return_value={})
+    def test_nearby_categories_counts(self, *args):
+        '''
+        Test that the number of places per category
+        is returned, most common categories first.
+        '''
+        # Create and authenticate regular user
+        self.authenticateRegularUser()
+
+        category_1 = create_test_category(name='Test 1')
+        category_2 = create_test_category(name='Test 2')
+
+        for categories in ([category_1, category_2], [category_2]):
+            place = create_test_place(
+                location={'latitude': 0.001, 'longitude': 0.001}
+            )
+            place.categories.add(*categories)
+
+        response = self.client.get(
+            reverse('place-nearby-categories'),
+            data={'latitude': 0.0, 'longitude': 0.0, 'counts': 'true'}
+        )
+
+        self.assertEquals(response.data, {'Test 2': 2, 'Test 1': 1})
+        self.assertEquals(list(response.data), ['Test 2', 'Test 1'])
+
+        # Test that the places are not loaded once the tiles are cached
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('place-nearby-categories'),
+                data={'latitude': 0.0, 'longitude': 0.0}
+            )
+
+        self.assertFalse(any(
+            'places_place' in query['sql'] for query in queries
+        ))
+        self.assertEquals(response.data, ['Test 2', 'Test 1'])
+
+    @patch(
+        'places.overpass.QueryBuilder.run_query', return_value=CandidateSet()
+    )
+    def test_nearby_places_queries_constant(self, *args):
+        '''
+        Test that the number of queries for nearby places
+        does not depend on the number of places.
+        '''
+        user = create_test_user()
+        self.client.force_authenticate(user)
+        route = create_test_route(user)
+        category = create_test_category()
+
+        def count_queries(places):
+            # Create rated places with categories
+            for _ in range(places):
+                place = create_test_place(
+                    location={'latitude': 0.001, 'longitude': 0.001}
+                )
+                place.categories.add(category)
+                create_test_review(create_test_visit(place, route))
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(
+                    reverse('place-nearby'),
+                    data={'latitude': 0.0, 'longitude': 0.0}
+                )
+
+            # Test that the ratings were included
+            self.assertEquals(response.data[0]['rating'], 3)
+
+            return len(context.captured_queries)
+
+        few = count_queries(2)
+        Place.objects.all().delete()
+        many = count_queries(10)
+
+        self.assertEquals(few, many)
+
+    @patch(
+        'places.overpass.QueryBuilder.run_query', return_value=CandidateSet()
+    )
+    def test_recommend_limit_offset(self, *args):
+        '''Test that a page of the recommended places can be requested'''
+        self.authenticateRegularUser()
+
+        # Create 5 places
+        for i in range(1, 6):
+            create_test_place(
+                location={'latitude': 0.001 * i, 'longitude': 0.001 * i}
+            )
+
+        url = reverse('place-recommend') + '?latitude=0.0&longitude=0.0'
+
+        response = self.client.post(url, {}, format='json')
+        ranking = [place['id'] for place in response.data]
+
+        response = self.client.post(
+            url, {'limit': 2, 'offset': 1}, format='json'
+        )
+
+        # Test that the requested page was returned
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(
+            [place['id'] for place in response.data], ranking[1:3]
+        )
+
+    @patch(
+        'places.overpass.QueryBuilder.run_query', return_value=CandidateSet()
+    )
+    def test_recommend_invalid_limit(self, *args):
+        '''Test that limit and offset must be non-negative integers'''
+        self.authenticateRegularUser()
+
+        url = reverse('place-recommend') + '?latitude=0.0&longitude=0.0'
+
+        for page in ({'limit': 'test'}, {'offset': -1}):
+            response = self.client.post(url, page, format='json')
+
+            # Test that the response status code is 400
+            self.assertEquals(response.status_code, 400)
@@ -0,0 +1,185 @@
+from django.test import TestCase
+
+from sklearn.feature_extraction.text import CountVectorizer
+from scipy.spatial import distance
+import numpy as np
+import pandas as pd
+
+from places.candidates import CandidateSet
+from places.services.recommendation import \
+    CosineSimilarityRecommendationService
+from places.vocabulary import CategoryVocabulary
+
+WEIGHTS = [8, 2, 1, 3]
+
+CATEGORIES = (
+    'cafe', 'bar', 'restaurant', 'museum', 'ruins', 'clothes',
+    'pizza', 'greek', 'monument', 'viewpoint', 'bakery', 'pub'
+)
+
+WHEELCHAIR = ('no', 'limited', 'yes', None)
+
+
+def reference_recommend(places, user_features, weights):
+    '''
+    The original row-wise implementation of the recommendation scores,
+    used to check that the vectorized implementation is equivalent.
+    '''
+    wheelchair = user_features.get('wheelchair', 0)
+    user_categories = user_features.get('categories', [])
+
+    df = pd.DataFrame(places)
+    df['wheelchair'] = df['wheelchair'].map(
+        {'no': -1, 'limited': 1, 'yes': 2}
+    ).fillna(0)
+
+    cv = CountVectorizer()
+    count_array = cv.fit_transform(
+        df['categories'].apply(lambda row: ' '.join(row))
+    ).toarray()
+    categories = cv.get_feature_names_out()
+    user_vector = [int(category in user_categories) for category in categories]
+
+    df['category_similarity'] = [
+        1 - distance.cosine(vector, user_vector) for vector in count_array
+    ]
+
+    max_distance = df['distance'].max() - 0.000001
+    df['score'] = df.apply(
+        lambda v: 1 - distance.cosine(
+            [1.0, wheelchair, 1.0, 1.0],
+            [
+                10*v['category_similarity'],
+                v['wheelchair'],
+                1 - v['distance'] / max_distance,
+                (v['rating'] if v['rating'] == v['rating'] else 0) / 5.0
+            ],
+            w=weights
+        ), axis=1
+    )
+
+    df.sort_values(by=['score'], ascending=[False], inplace=True)
+    return df
+
+
+def create_places(count, seed=0):
+    '''Create random places with distinct distances'''
+    random = np.random.default_rng(seed)
+
+    return [
+        {
+            'id': id,
+            'source': 'osm',
+            'name': f'Place {id}',
+            'distance': float(distance),
+            'location': {'latitude': 0.0, 'longitude': 0.0},
+            'rating': float(random.integers(1, 6))
+            if random.random() > 0.3 else None,
+            'wheelchair': WHEELCHAIR[random.integers(0, len(WHEELCHAIR))],
+            'categories': list(random.choice(
+                CATEGORIES, size=random.integers(1, 4), replace=False
+            )),
+        }
+        for id, distance in enumerate(
+            random.permutation(count) * 7.5 + 10, start=1
+        )
+    ]
+
+
+class RecommendationServiceTest(TestCase):
+    '''Tests for the recommendation service'''
+
+    def assertEquivalent(self, places, user_features, vocabulary=None):
+        service = CosineSimilarityRecommendationService(
+            weights=WEIGHTS, vocabulary=vocabulary
+        )
+
+        recommendations = service.recommend(
+            CandidateSet.from_records(places), user_features
+        )
+        reference = reference_recommend(
+            [dict(place) for place in places], user_features, WEIGHTS
+        )
+
+        ids = [place['id'] for place in recommendations]
+        scores = np.array([
+            np.nan if place['score'] is None else place['score']
+            for place in recommendations
+        ], dtype=float)
+
+        reference_scores = reference.set_index('id')['score']
+
+        # Test that every place got the same score
+        self.assertEquals(sorted(ids), sorted(reference_scores.index))
+        np.testing.assert_allclose(
+            scores, reference_scores[ids].to_numpy(), atol=1e-9
+        )
+
+        # Test that the places are ranked by score (ties aside)
+        ranked = scores[~np.isnan(scores)]
+        self.assertTrue(np.all(np.diff(ranked) <= 1e-9))
+        self.assertTrue(np.all(np.isnan(scores[len(ranked):])))
+
+    def test_equivalent_ranking(self):
+        '''Test that the ranking matches the row-wise implementation'''
+        for seed in range(5):
+            self.assertEquivalent(
+                create_places(200, seed),
+                {'categories': ['cafe', 'museum', 'pizza']}
+            )
+
+    def test_equivalent_ranking_without_categories(self):
+        '''Test the ranking when the user has not selected categories'''
+        self.assertEquivalent(create_places(50), {})
+
+    def test_equivalent_ranking_sparse(self):
+        '''
+        Test that the ranking with a shared vocabulary, which contains
+        categories missing from the places, matches the original ranking
+        '''
+        vocabulary = CategoryVocabulary(['hotel', 'cinema', 'Test 1'])
+
+        for seed in range(5):
+            self.assertEquivalent(
+                create_places(200, seed),
+                {'categories': ['cafe', 'museum', 'pizza', 'hotel']},
+                vocabulary=vocabulary
+            )
+
+        # Test that the vocabulary grew with the observed categories
+        for category in CATEGORIES:
+            self.assertIn(category, vocabulary)
+
+    def test_wheelchair_pruning(self):
+        '''Test that places without wheelchair access are pruned'''
+        service = CosineSimilarityRecommendationService(weights=WEIGHTS)
+
+        recommendations = service.recommend(
+            CandidateSet.from_records(create_places(50)),
+            {'wheelchair': 1, 'categories': ['cafe']}
+        )
+
+        self.assertTrue(recommendations)
+        self.assertNotIn(
+            'no', [place['wheelchair'] for place in recommendations]
+        )
+
+    def test_limit_offset(self):
+        '''Test that limit and offset select a page of the full ranking'''
+        service = CosineSimilarityRecommendationService(weights=WEIGHTS)
+        places = CandidateSet.from_records(create_places(100))
+        user_features = {'categories': ['cafe', 'museum']}
+
+        ranking = [
+            place['id'] for place in service.recommend(places, user_features)
+        ]
+
+        for limit, offset in ((20, 0), (20, 40), (30, 90), (0, 0)):
+            page = service.recommend(
+                places, user_features, limit=limit, offset=offset
+            )
+
+            self.assertEquals(
+                [place['id'] for place in page],
+                ranking[offset:offset + limit]
+            )
@@ -0,0 +1,57 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from places.models import Place
+from places.serializers import PlaceSerializer, PlaceReadSerializer, \
+    PLACE_VALUES
+from routes.models import PlaceRating
+from shared.test_utils import create_test_place, create_test_category
+
+
+class PlaceReadSerializerTest(TestCase):
+    '''Tests for the read-only place serializer'''
+
+    def setUp(self):
+        category_1 = create_test_category(name='Test 1')
+        category_2 = create_test_category(name='Test 2')
+
+        for i in range(1, 4):
+            place = create_test_place(
+                name=f'Place {i}',
+                location={'latitude': 0.001 * i, 'longitude': 0.002 * i},
+                wheelchair=('yes', 'no', None)[i - 1]
+            )
+
+            if i > 1:
+                place.categories.add(category_1, category_2)
+
+        PlaceRating.objects.record('roamium', place.id, 4)
+
+    def test_same_output_as_place_serializer(self):
+        '''Test that the output is identical to the PlaceSerializer'''
+        places = Place.objects.prefetch_related('categories').order_by('id')
+        rows = Place.objects.values(*PLACE_VALUES).order_by('id')
+
+        expected = PlaceSerializer(places, many=True).data
+        data = PlaceReadSerializer(rows, many=True).data
+
+        self.assertEquals(
+            [list(place.items()) for place in data],
+            [list(place.items()) for place in expected]
+        )
+
+        # Test that single rows are serialized the same way
+        self.assertEquals(
+            PlaceReadSerializer(rows[2]).data,
+            PlaceSerializer(places[2]).data
+        )
+
+    def test_queries_constant(self):
+        '''Test that the categories and ratings are fetched once'''
+        rows = Place.objects.values(*PLACE_VALUES)
+
+        with CaptureQueriesContext(connection) as queries:
+            PlaceReadSerializer(rows, many=True).data
+
+        self.assertEquals(len(queries), 3)
@@ -0,0 +1,121 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from unittest.mock import MagicMock
+import threading
+import time
+
+from places.services.singleflight import SingleFlight, \
+    SingleFlightTimeout, MISSING
+
+
+class SingleFlightTest(TestCase):
+    '''Tests for the coalescing of identical concurrent calls'''
+
+    def setUp(self):
+        cache.clear()
+        self.single_flight = SingleFlight(
+            cache, 'test', timeout=5, poll_interval=0.05
+        )
+
+        # The stored results of the calls
+        self.stored = {}
+
+    def store(self):
+        time.sleep(0.3)
+        self.stored['query'] = ['result']
+        return ['result']
+
+    def load(self):
+        return self.stored.get('query', MISSING)
+
+    def test_concurrent_calls_coalesced(self):
+        '''Test that concurrent identical calls run only once'''
+        function = MagicMock(side_effect=self.store)
+        results = []
+
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                self.single_flight.do('query', function, self.load)
+            ))
+            for _ in range(5)
+        ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Test that every caller got the result of a single call
+        self.assertEquals(function.call_count, 1)
+        self.assertEquals(results, [['result']] * 5)
+
+    def test_sequential_calls_not_cached(self):
+        '''Test that calls which do not overlap are not coalesced'''
+        function = MagicMock(return_value='result')
+        load = MagicMock(return_value='result')
+
+        self.single_flight.do('query', function, load)
+        self.single_flight.do('query', function, load)
+
+        self.assertEquals(function.call_count, 2)
+        load.assert_not_called()
+
+    def test_missing_result_called_again(self):
+        '''Test that waiting callers call again if the result is missing'''
+        function = MagicMock(
+            side_effect=lambda: time.sleep(0.3) or ['result']
+        )
+        results = []
+
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                self.single_flight.do('query', function, lambda: MISSING)
+            ))
+            for _ in range(2)
+        ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(function.call_count, 2)
+        self.assertEquals(results, [['result']] * 2)
+
+    def test_failed_flight_called_once(self):
+        '''Test that waiting callers share the error of a failed call'''
+        function = MagicMock(
+            side_effect=lambda: time.sleep(0.3) or 1 / 0
+        )
+        errors = []
+
+        def call():
+            try:
+                self.single_flight.do('query', function, self.load)
+            except ZeroDivisionError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Test that the function was not called again by the waiters
+        self.assertEquals(function.call_count, 1)
+        self.assertEquals(len(errors), 5)
+
+    def test_waiting_caller_times_out(self):
+        '''Test that waiting callers give up without calling again'''
+        single_flight = SingleFlight(cache, 'test', timeout=0.2)
+        function = MagicMock(return_value='result')
+
+        # Another caller holds the lock
+        cache.add(single_flight.lock_key('query'), 'flight', 5)
+
+        with self.assertRaises(SingleFlightTimeout):
+            single_flight.do('query', function, self.load)
+
+        function.assert_not_called()
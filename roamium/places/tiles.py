@@ -0,0 +1,279 @@
+from collections import namedtuple
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connections
+
+from .distance import within_radius
+from .services.singleflight import SingleFlight, SingleFlightTimeout, \
+    MISSING
+
+logger = logging.getLogger(__name__)
+
+# Approximate length of a degree of latitude in meters
+METERS_PER_DEGREE = 111320
+
+
+def tile_for_point(longitude, latitude, zoom) -> tuple:
+    '''Returns the (x, y) slippy map tile that contains the given point.'''
+    n = 2 ** zoom
+    latitude = max(min(latitude, 85.0511), -85.0511)
+
+    x = int((longitude + 180.0) / 360.0 * n)
+    y = int(
+        (1.0 - math.asinh(math.tan(math.radians(latitude))) / math.pi)
+        / 2.0 * n
+    )
+
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(x, y, zoom) -> tuple:
+    '''Returns the (south, west, north, east) bounds of a slippy map tile.'''
+    n = 2 ** zoom
+
+    def latitude(y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+
+    return latitude(y + 1), x / n * 360.0 - 180.0, \
+        latitude(y), (x + 1) / n * 360.0 - 180.0
+
+
+def bounding_box(longitude, latitude, radius) -> tuple:
+    '''
+    Returns the (south, west, north, east) bounding box of the circle
+    with the given center and radius (in meters).
+    '''
+    lat_offset = radius / METERS_PER_DEGREE
+    lon_offset = radius / (
+        METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01)
+    )
+
+    return latitude - lat_offset, longitude - lon_offset, \
+        latitude + lat_offset, longitude + lon_offset
+
+
+def tiles_for_radius(longitude, latitude, radius, zoom) -> list:
+    '''
+    Returns the slippy map tiles covering the bounding box
+    of the circle with the given center and radius (in meters).
+    '''
+    south, west, north, east = bounding_box(longitude, latitude, radius)
+
+    min_x, max_y = tile_for_point(west, south, zoom)
+    max_x, min_y = tile_for_point(east, north, zoom)
+
+    return [
+        (x, y)
+        for x in range(min_x, max_x + 1)
+        for y in range(min_y, max_y + 1)
+    ]
+
+
+class OverpassError(Exception):
+    '''Raised when the Overpass API can not be queried.'''
+    pass
+
+
+# The freshness of the OSM elements returned by a query:
+# status: 'fresh', 'stale' (being refreshed) or 'unavailable'
+# age: The age in seconds of the oldest returned elements
+Freshness = namedtuple('Freshness', ('status', 'age'))
+
+FRESH = 'fresh'
+STALE = 'stale'
+UNAVAILABLE = 'unavailable'
+
+
+class OverpassTileCache:
+    '''
+    Caches the elements returned by Overpass per slippy map tile,
+    so that overlapping queries share the already fetched areas.
+
+    Tiles older than the timeout are still served while they are
+    refreshed in the background, and while Overpass is unavailable,
+    until they expire after the stale timeout.
+
+    The tiles are kept in the 'tiles' cache, which may cull them.
+    '''
+
+    def __init__(self, builder, zoom=None, timeout=None, stale_timeout=None):
+        self.builder = builder
+        self.zoom = zoom or settings.OVERPASS_TILE_ZOOM
+        self.timeout = timeout or settings.OVERPASS_CACHE_TIMEOUT
+        self.stale_timeout = max(
+            stale_timeout or settings.OVERPASS_STALE_TIMEOUT, self.timeout
+        )
+        self.freshness = None
+
+        # Queries with different filters or output must not share tiles
+        self.signature = hashlib.md5(
+            builder.compile(area='').encode()
+        ).hexdigest()
+
+    def tiles(self) -> list:
+        '''Returns the tiles covering the builder's search area.'''
+        return tiles_for_radius(
+            self.builder.longitude, self.builder.latitude,
+            self.builder.radius, self.zoom
+        )
+
+    def key(self, tile) -> str:
+        x, y = tile
+        return f'overpass:tiles:{self.signature}:{self.zoom}:{x}:{y}'
+
+    def _fetch_tiles(self, tiles) -> dict:
+        '''
+        Fetches the elements of the given tiles with a single query
+        and groups them by the tile they belong to.
+        '''
+        bounds = [tile_bounds(x, y, self.zoom) for x, y in tiles]
+
+        area = ','.join(str(value) for value in (
+            min(bound[0] for bound in bounds),
+            min(bound[1] for bound in bounds),
+            max(bound[2] for bound in bounds),
+            max(bound[3] for bound in bounds),
+        ))
+
+        elements = {tile: [] for tile in tiles}
+
+        for element in self.builder.fetch_elements(
+            self.builder.compile(area)
+        ):
+            tile = tile_for_point(element['lon'], element['lat'], self.zoom)
+
+            # Elements of tiles that were not requested are dropped
+            if tile in elements:
+                elements[tile].append(element)
+
+        return elements
+
+    def _store_tiles(self, tiles) -> dict:
+        '''
+        Fetches the given tiles and stores them in the cache.
+        Identical fetches that are already running in any worker are
+        not repeated, their tiles are read from the cache once stored.
+        '''
+        keys = [self.key(tile) for tile in tiles]
+
+        def store():
+            fetched = time.time()
+
+            entries = {
+                self.key(tile): {'elements': elements, 'fetched': fetched}
+                for tile, elements in self._fetch_tiles(tiles).items()
+            }
+            caches['tiles'].set_many(entries, timeout=self.stale_timeout)
+
+            return entries
+
+        def load():
+            entries = caches['tiles'].get_many(keys)
+            return entries if len(entries) == len(keys) else MISSING
+
+        single_flight = SingleFlight(
+            cache, 'overpass', timeout=settings.OVERPASS_COALESCE_TIMEOUT
+        )
+
+        # Only the caller that fetches the tiles queries Overpass,
+        # the others share the stored tiles or the error it raised
+        try:
+            return single_flight.do('|'.join(keys), store, load)
+        except SingleFlightTimeout:
+            raise OverpassError('Timed out waiting for the Overpass query.')
+
+    def refresh(self, tiles):
+        '''Refreshes the given stale tiles, unless already refreshing.'''
+        lock = 'overpass:refresh:' + hashlib.md5(
+            '|'.join(self.key(tile) for tile in tiles).encode()
+        ).hexdigest()
+
+        if not cache.add(lock, True, settings.OVERPASS_COALESCE_TIMEOUT):
+            return
+
+        try:
+            self._store_tiles(tiles)
+        except OverpassError:
+            logger.warning('Failed to refresh %d stale tiles', len(tiles))
+        finally:
+            cache.delete(lock)
+
+    def refresh_in_background(self, tiles):
+        '''Refreshes the given stale tiles in a background thread.'''
+        def run():
+            try:
+                self.refresh(tiles)
+            finally:
+                # The thread may have opened its own database connection
+                connections.close_all()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get_tiles(self, tiles) -> dict:
+        '''
+        Returns the cached entries of the given tiles, fetching only the
+        tiles that are missing from the cache. Tiles that could not be
+        fetched are omitted. The freshness of the returned tiles is kept
+        in self.freshness.
+        '''
+        keys = {tile: self.key(tile) for tile in tiles}
+
+        cached = caches['tiles'].get_many(keys.values())
+        now = time.time()
+
+        missing = [tile for tile in tiles if keys[tile] not in cached]
+        stale = [
+            tile for tile in tiles if keys[tile] in cached and
+            now - cached[keys[tile]]['fetched'] > self.timeout
+        ]
+
+        status = FRESH
+
+        if missing:
+            # The stale tiles are refreshed with the same query
+            try:
+                cached.update(self._store_tiles(missing + stale))
+                stale = []
+            except OverpassError:
+                logger.warning('Failed to fetch %d tiles', len(missing))
+                status = UNAVAILABLE
+
+        if stale and status == FRESH:
+            self.refresh_in_background(stale)
+            status = STALE
+
+        entries = {
+            tile: cached[keys[tile]] for tile in tiles if keys[tile] in cached
+        }
+
+        self.freshness = Freshness(status, max(
+            (max(now - entry['fetched'], 0) for entry in entries.values()),
+            default=None
+        ))
+
+        return entries
+
+    def get_elements(self) -> list:
+        '''
+        Returns the elements within the builder's radius,
+        fetching only the tiles that are missing from the cache.
+        The freshness of the returned elements is kept in self.freshness.
+        '''
+        entries = self.get_tiles(self.tiles())
+
+        # Keep only the elements within the requested radius
+        return within_radius(
+            self.builder.longitude, self.builder.latitude,
+            [
+                element
+                for entry in entries.values()
+                for element in entry['elements']
+            ],
+            self.builder.radius
+        )
@@ -1,30 +1,46 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.cache import caches
 from django.contrib.gis.geos import Point
-from django.contrib.gis.db.models.functions import Distance
-import pandas as pd
+from collections import Counter
+import numpy as np
+import requests
 import os
 
 from .models import Place, Category
-from .serializers import PlaceSerializer, PlaceDistanceSerializer,\
-    CategorySerializer
-from .overpass import QueryBuilder
+from .serializers import PlaceSerializer, PlaceReadSerializer, \
+    CategorySerializer, PLACE_VALUES, get_place_categories
+from .candidates import CandidateSet
+from .distance import haversine_distances
+from .functions import DWithin, KNNDistance
+from .histograms import LocalCategoryHistograms, \
+    OverpassCategoryHistograms, MirrorCategoryHistograms
+from .overpass import QueryBuilder, OSM_PLACE_TAGS, is_place
 from .services.recommendation import CosineSimilarityRecommendationService
-from .services.directions import ORSDirectionsService
+from .services.directions import ORSDirectionsService, \
+    CachedDirectionsService
+from .services.rating import PlaceRatingService
+from .tiles import tiles_for_radius
+from .vocabulary import get_category_vocabulary
 
-OSM_PLACE_TAGS = ('amenity', 'historic', 'tourism', 'shop')
 ORS_API_KEY = os.environ.get('ORS_API_KEY')
 
 LON_LAT_REQUIRED = "Float parameters 'longitude' and 'latitude' are required."
 LON_LAT_FLOAT = "Parameters 'longitude' and 'latitude' must be 'float'."
+LIMIT_OFFSET_INTEGER = \
+    "Parameters 'limit' and 'offset' must be non-negative integers."
 
 
 class PlaceViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAdminUser]
-    queryset = Place.objects.all()
+    queryset = Place.objects.prefetch_related('categories')
     serializer_class = PlaceSerializer
 
+    # The freshness of the OSM places of the request
+    freshness = None
+
     def get_permissions(self):
         if self.action in (
             'list', 'retrieve', 'nearby',
@@ -34,6 +50,19 @@ class PlaceViewSet(viewsets.ModelViewSet):
 
         return super(PlaceViewSet, self).get_permissions()
 
+    def get_queryset(self):
+        # Places are only read as rows of their values
+        if self.action in ('list', 'retrieve'):
+            return Place.objects.values(*PLACE_VALUES)
+
+        return super(PlaceViewSet, self).get_queryset()
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'retrieve'):
+            return PlaceReadSerializer
+
+        return super(PlaceViewSet, self).get_serializer_class()
+
     def _parse_parameters(self, request) -> tuple:
         '''Parse the request's parameters.'''
         # Get user location parameters
@@ -45,34 +74,110 @@ class PlaceViewSet(viewsets.ModelViewSet):
 
         return longitude, latitude, radius
 
-    def _get_places(self, request) -> tuple:
+    def _parse_page(self, request) -> tuple:
+        '''Parse the optional limit and offset of a request.'''
+        def get(name):
+            return request.query_params.get(name, request.data.get(name))
+
+        limit = get('limit')
+        limit = None if limit is None else int(limit)
+        offset = int(get('offset') or 0)
+
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError(LIMIT_OFFSET_INTEGER)
+
+        return limit, offset
+
+    def _freshness_headers(self) -> dict:
         '''
-        Get places within the given radius
-        from the given set of coordinates.
+        Headers describing the freshness of the OSM places,
+        which may be stale or missing while Overpass is unavailable.
         '''
-        longitude, latitude, radius = self._parse_parameters(request)
-        user_location = Point(longitude, latitude, srid=4326)
+        if self.freshness is None:
+            return {}
+
+        headers = {'X-OSM-Freshness': self.freshness.status}
 
-        places = Place.objects.annotate(
-            distance=Distance('location', user_location)
-        ).filter(distance__lt=radius)
+        if self.freshness.age is not None:
+            headers['X-OSM-Age'] = str(int(self.freshness.age))
 
+        return headers
+
+    def _get_local_places(self, user_location, radius) -> CandidateSet:
+        '''
+        Get the local places within the given radius
+        from the given location as a candidate set.
+        '''
+        # Use the spatial index to find the places within the radius,
+        # which the database returns already sorted by distance
+        places = list(Place.objects.filter(
+            DWithin('location', user_location, radius)
+        ).order_by(
+            KNNDistance('location', user_location)
+        ).values_list('id', 'name', 'location', 'wheelchair'))
+
+        ids = [place[0] for place in places]
+        longitudes = [place[2].x for place in places]
+        latitudes = [place[2].y for place in places]
+
+        # Collect the categories of all the places in a single query
+        categories = get_place_categories(ids)
+
+        ratings = PlaceRatingService().get_ratings(
+            [('roamium', place_id) for place_id in ids]
+        )
+
+        return CandidateSet(
+            ids=ids,
+            sources=['roamium'] * len(ids),
+            names=[place[1] for place in places],
+            longitudes=longitudes,
+            latitudes=latitudes,
+            distances=haversine_distances(
+                user_location.x, user_location.y, longitudes, latitudes
+            ),
+            wheelchair=[place[3] for place in places],
+            ratings=[
+                ratings[('roamium', place_id)].stars
+                if ('roamium', place_id) in ratings else np.nan
+                for place_id in ids
+            ],
+            categories=[categories[place_id] for place_id in ids]
+        )
+
+    def _get_builder(self, longitude, latitude, radius) -> QueryBuilder:
+        '''Get the query builder of the OSM places.'''
         # Instantiate a new QueryBuilder
-        builder = QueryBuilder(longitude, latitude, radius=radius)
+        builder = QueryBuilder(
+            longitude, latitude, radius=radius, element_filter=is_place
+        )
 
         # Add a node for every OSM tag
         for tag in OSM_PLACE_TAGS:
             builder.add_node(name=None, **{tag: None})
 
+        return builder
+
+    def _get_places(self, request) -> tuple:
+        '''
+        Get places within the given radius
+        from the given set of coordinates.
+        '''
+        longitude, latitude, radius = self._parse_parameters(request)
+        user_location = Point(longitude, latitude, srid=4326)
+
+        places = self._get_local_places(user_location, radius)
+
+        builder = self._get_builder(longitude, latitude, radius)
+
         # Run the query to fetch the places
-        try:
+        if settings.OSM_PLACES_SOURCE == 'local':
+            osm_places = builder.run_local_query()
+        else:
             osm_places = builder.run_query()
-        except ValueError:
-            raise RuntimeError('Overpass rate limit!')
+            self.freshness = builder.freshness
 
-        return PlaceDistanceSerializer(
-            places, many=True, context={'request': request}
-        ).data + osm_places, radius
+        return CandidateSet.concatenate(places, osm_places), radius
 
     @action(detail=False, methods=['GET'])
     def nearby(self, request):
@@ -88,20 +193,52 @@ class PlaceViewSet(viewsets.ModelViewSet):
                 {'detail': LON_LAT_FLOAT},
                 status.HTTP_400_BAD_REQUEST
             )
-        except RuntimeError as e:
-            return Response({'detail': str(e)}, status.HTTP_400_BAD_REQUEST)
 
         # Sort all places by distance
-        if len(places) > 0:
-            places = pd.DataFrame(places)\
-                .sort_values(by='distance').to_dict('records')
+        order = np.argsort(places.distances, kind='stable')
+
+        return Response(
+            places.to_records(order), headers=self._freshness_headers()
+        )
+
+    def _get_category_histogram(self, request) -> Counter:
+        '''
+        Get the number of places per category of the tiles
+        covering the given radius from the given set of coordinates.
+        '''
+        longitude, latitude, radius = self._parse_parameters(request)
+        builder = self._get_builder(longitude, latitude, radius)
+
+        if settings.OSM_PLACES_SOURCE != 'local' and not builder.cacheable:
+            # Areas too large to be cached are counted place by place
+            places, radius = self._get_places(request)
+
+            return Counter(
+                category
+                for index in range(len(places))
+                for category in set(places.place_categories(index))
+            )
+
+        tiles = tiles_for_radius(
+            longitude, latitude, radius, settings.OVERPASS_TILE_ZOOM
+        )
+
+        if settings.OSM_PLACES_SOURCE == 'local':
+            osm_histograms = MirrorCategoryHistograms()
+        else:
+            osm_histograms = OverpassCategoryHistograms(builder)
+
+        histogram = LocalCategoryHistograms().get(tiles)
+        histogram.update(osm_histograms.get(tiles))
+
+        self.freshness = getattr(osm_histograms, 'freshness', None)
 
-        return Response(places)
+        return histogram
 
     @action(detail=False, methods=['GET'], url_path='nearby/categories')
     def nearby_categories(self, request):
         try:
-            places, radius = self._get_places(request)
+            histogram = self._get_category_histogram(request)
         except TypeError:
             return Response(
                 {'detail': LON_LAT_REQUIRED},
@@ -112,19 +249,29 @@ class PlaceViewSet(viewsets.ModelViewSet):
                 {'detail': LON_LAT_FLOAT},
                 status.HTTP_400_BAD_REQUEST
             )
-        except RuntimeError as e:
-            return Response({'detail': str(e)}, status.HTTP_400_BAD_REQUEST)
 
-        # Use a set to collect all the discrete categories
-        categories = set()
-        for place in places:
-            for category in place['categories']:
-                categories.add(category)
+        # The most common categories come first
+        categories = sorted(
+            histogram.items(), key=lambda item: (-item[1], item[0])
+        )
+
+        if request.query_params.get('counts') in ('true', '1'):
+            data = dict(categories)
+        else:
+            data = [category for category, count in categories]
 
-        return Response(list(categories))
+        return Response(data, headers=self._freshness_headers())
 
     @action(detail=False, methods=['POST'])
     def recommend(self, request):
+        try:
+            limit, offset = self._parse_page(request)
+        except (TypeError, ValueError):
+            return Response(
+                {'detail': LIMIT_OFFSET_INTEGER},
+                status.HTTP_400_BAD_REQUEST
+            )
+
         try:
             places, radius = self._get_places(request)
         except TypeError:
@@ -137,8 +284,6 @@ class PlaceViewSet(viewsets.ModelViewSet):
                 {'detail': LON_LAT_FLOAT},
                 status.HTTP_400_BAD_REQUEST
             )
-        except RuntimeError as e:
-            return Response({'detail': str(e)}, status.HTTP_400_BAD_REQUEST)
 
         # Calculate wieghts
         categories_weight = 8
@@ -155,15 +300,18 @@ class PlaceViewSet(viewsets.ModelViewSet):
 
         # Recommend places
         recommendation_service = CosineSimilarityRecommendationService(
-            weights=weights
+            weights=weights,
+            vocabulary=get_category_vocabulary()
         )
 
         recommendations = recommendation_service.recommend(
             places,
-            request.data
+            request.data,
+            limit=limit,
+            offset=offset
         )
 
-        return Response(recommendations)
+        return Response(recommendations, headers=self._freshness_headers())
 
     @action(detail=False, methods=['POST'])
     def directions(self, request):
@@ -183,11 +331,21 @@ class PlaceViewSet(viewsets.ModelViewSet):
                 status.HTTP_400_BAD_REQUEST
             )
 
-        directions_service = ORSDirectionsService(ORS_API_KEY)
-        geometry, distance, duration = directions_service.get_directions(
-            points,
-            profile=profile
+        directions_service = CachedDirectionsService(
+            ORSDirectionsService(ORS_API_KEY),
+            caches['directions'],
+            precision=settings.DIRECTIONS_CACHE_PRECISION
         )
+        try:
+            geometry, distance, duration = directions_service.get_directions(
+                points,
+                profile=profile
+            )
+        except requests.RequestException:
+            return Response(
+                {'detail': 'The directions service is unavailable.'},
+                status.HTTP_503_SERVICE_UNAVAILABLE
+            )
 
         return Response({
             'geometry': geometry,
@@ -0,0 +1,102 @@
+import re
+import threading
+
+import numpy as np
+
+from .models import Category
+
+# The same tokenization as sklearn's CountVectorizer defaults
+TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+
+
+class CategoryVocabulary:
+    '''
+    Maps category tokens to column indices, growing as new tokens
+    are observed, so that it can be shared between requests.
+    '''
+
+    def __init__(self, categories=()):
+        self.indices = {}
+        self.lock = threading.Lock()
+        self.add(categories)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __contains__(self, token):
+        return token in self.indices
+
+    @staticmethod
+    def tokenize(categories) -> list:
+        '''Splits a list of categories into tokens.'''
+        return TOKEN_PATTERN.findall(' '.join(categories).lower())
+
+    def add(self, categories) -> list:
+        '''
+        Adds the tokens of the given categories to the vocabulary
+        and returns their indices.
+        '''
+        tokens = self.tokenize(categories)
+
+        # Only lock when the vocabulary actually grows
+        if any(token not in self.indices for token in tokens):
+            with self.lock:
+                for token in tokens:
+                    self.indices.setdefault(token, len(self.indices))
+
+        return [self.indices[token] for token in tokens]
+
+    def transform(self, place_categories):
+        '''
+        Returns a sparse matrix with the token counts
+        of each place's categories (one row per place).
+        '''
+        indptr = [0]
+        indices = []
+
+        for categories in place_categories:
+            indices += self.add(categories)
+            indptr.append(len(indices))
+
+        # scipy is only loaded once places are actually ranked
+        from scipy.sparse import csr_matrix
+
+        matrix = csr_matrix(
+            (np.ones(len(indices)), indices, indptr),
+            shape=(len(indptr) - 1, len(self))
+        )
+        matrix.sum_duplicates()
+
+        return matrix
+
+    def vector(self, categories, size=None) -> np.ndarray:
+        '''
+        Returns a binary vector of the vocabulary tokens
+        that exactly match one of the given categories.
+        '''
+        vector = np.zeros(size or len(self))
+
+        for category in categories:
+            index = self.indices.get(category)
+            if index is not None and index < vector.size:
+                vector[index] = 1.0
+
+        return vector
+
+
+_category_vocabulary = None
+
+
+def get_category_vocabulary() -> CategoryVocabulary:
+    '''
+    Returns the process-wide category vocabulary,
+    seeded with the names of the existing categories.
+    '''
+    global _category_vocabulary
+
+    if _category_vocabulary is None:
+        _category_vocabulary = CategoryVocabulary(
+            Category.objects.values_list('name', flat=True)
+        )
+
+    return _category_vocabulary
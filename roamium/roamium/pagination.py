@@ -0,0 +1,34 @@
+from rest_framework import pagination
+from rest_framework.response import Response
+
+
+class CursorPagination(pagination.CursorPagination):
+    '''
+    Paginates lists by their (indexed) ids, which stays fast
+    and consistent however deep the page is. The response body
+    is the page itself, with the links to the adjacent pages in
+    the `Link` header.
+
+    Clients may choose the page size with `page_size`,
+    up to `max_page_size`.
+    '''
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_links(self) -> dict:
+        return {
+            relation: url for relation, url in (
+                ('next', self.get_next_link()),
+                ('prev', self.get_previous_link()),
+            ) if url is not None
+        }
+
+    def get_paginated_response(self, data):
+        links = self.get_links()
+
+        headers = {'Link': ', '.join(
+            f'<{url}>; rel="{relation}"' for relation, url in links.items()
+        )} if links else None
+
+        return Response(data, headers=headers)
@@ -13,3 +13,29 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASS')
     }
 }
+
+# Share the cache between the gunicorn workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'roamium_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000000
+        }
+    },
+    'tiles': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'roamium_tiles_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000
+        }
+    },
+    'directions': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'roamium_directions_cache',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000
+        }
+    }
+}
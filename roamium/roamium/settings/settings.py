@@ -87,6 +87,35 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# The default cache holds the locks and the shared state of the workers,
+# which must never be culled, so the bulky entries have their own caches
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000
+        }
+    },
+    'tiles': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tiles',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000
+        }
+    },
+    'directions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'directions',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000
+        }
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -141,9 +170,76 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'roamium.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'roamium.pagination.CursorPagination',
+    'PAGE_SIZE': 50
 }
 
 SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=5)
 }
+
+# Overpass
+# Set to 'local' to query the OSM mirror populated by `import_osm`
+OSM_PLACES_SOURCE = os.environ.get('OSM_PLACES_SOURCE', 'overpass')
+
+# Results are cached per slippy map tile (zoom 15 tiles are ~1km wide)
+OVERPASS_TILE_ZOOM = 15
+OVERPASS_CACHE_TIMEOUT = 60 * 60 * 6
+OVERPASS_MAX_TILES = 100
+
+# Server side limits of the Overpass queries (seconds and bytes),
+# which are kept low so that Overpass schedules them sooner.
+# The timeout is not shorter than HTTP_READ_TIMEOUT.
+OVERPASS_QUERY_TIMEOUT = 25
+OVERPASS_QUERY_MAXSIZE = 64 * 1024 * 1024
+
+# Overpass responses are parsed incrementally in chunks of this many bytes
+OVERPASS_CHUNK_SIZE = 64 * 1024
+
+# Tiles older than OVERPASS_CACHE_TIMEOUT are served while they are
+# refreshed in the background, or while Overpass is unavailable
+OVERPASS_STALE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Overpass is not queried for a while after repeated failures
+OVERPASS_CIRCUIT_THRESHOLD = 5
+OVERPASS_CIRCUIT_RESET_TIMEOUT = 60
+
+# Identical Overpass queries running at the same time are sent only once,
+# the other workers wait up to this many seconds for the result
+OVERPASS_COALESCE_TIMEOUT = 30
+
+# Category histograms
+# The histograms of the local places are invalidated when the places
+# change, and also expire in case a change skipped the model signals
+CATEGORY_HISTOGRAMS_TIMEOUT = 60 * 60
+
+# Directions
+# Waypoints are rounded to 5 decimals (~1m) to build the cache keys
+DIRECTIONS_CACHE_PRECISION = 5
+
+# External HTTP services
+# Each worker keeps a pool of keep-alive connections per host
+HTTP_CONNECT_TIMEOUT = 3.05
+HTTP_READ_TIMEOUT = 20
+HTTP_POOL_SIZE = 4
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'places.services.http': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
@@ -0,0 +1,65 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from roamium.pagination import CursorPagination
+from shared.test_utils import create_test_user, create_test_place, \
+    create_test_category
+
+
+class CursorPaginationTest(TestCase):
+    '''Tests for the pagination of the list endpoints'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(create_test_user())
+
+    def get_pages(self, url, page_size) -> list:
+        '''Follow the Link headers through all the pages of a list'''
+        pages = []
+        response = self.client.get(url, {'page_size': page_size})
+
+        while True:
+            self.assertEquals(response.status_code, 200)
+            pages.append([item['id'] for item in response.data])
+
+            links = dict(
+                reversed(link.split('; ')) for link in
+                response['Link'].split(', ')
+            ) if response.has_header('Link') else {}
+
+            if 'rel="next"' not in links:
+                return pages
+
+            response = self.client.get(links['rel="next"'].strip('<>'))
+
+    def test_places_paginated(self):
+        '''Test that the places are listed in pages ordered by id'''
+        ids = [create_test_place(name=f'Place {i}').id for i in range(5)]
+
+        pages = self.get_pages(reverse('place-list'), 2)
+
+        self.assertEquals(pages, [ids[0:2], ids[2:4], ids[4:]])
+
+    def test_categories_paginated(self):
+        '''Test that the categories are listed in pages ordered by id'''
+        ids = [create_test_category(name=f'Test {i}').id for i in range(3)]
+
+        pages = self.get_pages(reverse('category-list'), 2)
+
+        self.assertEquals(pages, [ids[0:2], ids[2:]])
+
+    @patch.object(CursorPagination, 'max_page_size', 2)
+    def test_page_size_capped(self):
+        '''Test that clients can not request pages over the maximum size'''
+        for i in range(3):
+            create_test_category(name=f'Test {i}')
+
+        response = self.client.get(
+            reverse('category-list'), {'page_size': 1000}
+        )
+
+        self.assertEquals(len(response.data), 2)
+        self.assertIn('rel="next"', response['Link'])
@@ -0,0 +1,69 @@
+from django.test import TestCase
+
+from rest_framework.renderers import JSONRenderer as DRFJSONRenderer
+from unittest.mock import patch
+import datetime
+import decimal
+import json
+import numpy as np
+
+from roamium.renderers import JSONRenderer
+
+
+class JSONRendererTest(TestCase):
+    '''Tests for the API JSON renderer'''
+
+    def setUp(self):
+        self.data = {
+            'id': np.int64(1),
+            'name': 'Καφέ Test',
+            'location': {'longitude': 23.7, 'latitude': np.float64(37.9)},
+            'distance': decimal.Decimal('1.5'),
+            'created': datetime.datetime(2022, 1, 1, 12, 0, 0, 123456),
+            'categories': ['cafe', 'bar'],
+            'rating': None,
+            1: 'Test'
+        }
+
+    def test_same_output_as_drf(self):
+        '''Test that the output is identical to the DRF renderer'''
+        # Only the formatting of very small or large floats differs
+        self.assertEquals(
+            JSONRenderer().render(self.data),
+            DRFJSONRenderer().render(self.data)
+        )
+
+    def test_float_formatting(self):
+        '''Test the accepted formatting of very small or large floats'''
+        data = [1e-05, 1e16, 1e-07, 1.5]
+
+        # Test that the numbers are written differently than DRF does
+        self.assertEquals(
+            JSONRenderer().render(data), b'[0.00001,1e16,1e-7,1.5]'
+        )
+        self.assertEquals(
+            DRFJSONRenderer().render(data), b'[1e-05,1e+16,1e-07,1.5]'
+        )
+
+        # Test that they are still parsed to the same values
+        self.assertEquals(json.loads(JSONRenderer().render(data)), data)
+
+    def test_standard_library_fallback(self):
+        '''Test that the standard library is used without orjson'''
+        with patch('roamium.renderers.orjson', None):
+            rendered = JSONRenderer().render(self.data)
+
+        self.assertEquals(rendered, DRFJSONRenderer().render(self.data))
+
+    def test_indented_output(self):
+        '''Test that indented output is still supported'''
+        media_type = 'application/json; indent=4'
+
+        self.assertEquals(
+            JSONRenderer().render([{'id': 1}], media_type),
+            DRFJSONRenderer().render([{'id': 1}], media_type)
+        )
+
+    def test_empty_output(self):
+        '''Test that no data is rendered as an empty body'''
+        self.assertEquals(JSONRenderer().render(None), b'')
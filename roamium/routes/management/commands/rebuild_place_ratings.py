@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from routes.models import PlaceRating
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the place ratings from the existing reviews.'
+
+    def handle(self, *args, **options):
+        PlaceRating.objects.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {PlaceRating.objects.count()} place ratings.'
+        ))
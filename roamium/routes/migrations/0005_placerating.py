@@ -0,0 +1,50 @@
+# Generated by Django 3.2.13 on 2026-10-17 11:02
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_place_ratings(apps, schema_editor):
+    Review = apps.get_model('routes', 'Review')
+    PlaceRating = apps.get_model('routes', 'PlaceRating')
+
+    ratings = Review.objects.values(
+        'visit__place_source', 'visit__place_id'
+    ).annotate(stars_sum=Sum('stars'), review_count=Count('id')).order_by()
+
+    PlaceRating.objects.bulk_create([
+        PlaceRating(
+            place_source=rating['visit__place_source'],
+            place_id=rating['visit__place_id'],
+            stars_sum=rating['stars_sum'],
+            review_count=rating['review_count']
+        )
+        for rating in ratings
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0004_alter_review_stars'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlaceRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('place_id', models.BigIntegerField()),
+                ('place_source', models.CharField(choices=[('roamium', 'Roamium'), ('osm', 'Open Street Maps')], max_length=7)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('stars_sum', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='placerating',
+            constraint=models.UniqueConstraint(fields=('place_source', 'place_id'), name='unique_place_rating'),
+        ),
+        migrations.RunPython(
+            populate_place_ratings, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.13 on 2026-10-17 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0005_placerating'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['place_source', 'place_id'], name='visit_place_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Sum
 from django.core.validators import MaxValueValidator, MinValueValidator
 
 
@@ -22,6 +23,14 @@ class Visit(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     route = models.ForeignKey(Route, on_delete=models.CASCADE)
 
+    class Meta:
+        # Reviews and ratings are looked up by place
+        indexes = (
+            models.Index(
+                fields=('place_source', 'place_id'), name='visit_place_idx'
+            ),
+        )
+
     def __str__(self) -> str:
         return f'{self.name} {self.timestamp}'
 
@@ -35,3 +44,67 @@ class Review(models.Model):
 
     def __str__(self) -> str:
         return f'{self.visit.name} {self.visit.timestamp} ({self.stars})'
+
+
+class PlaceRatingManager(models.Manager):
+
+    def record(self, place_source, place_id, stars, count=1):
+        '''
+        Adds the given stars and review count to a place's rating.
+        Negative values remove reviews from the rating.
+        '''
+        with transaction.atomic():
+            self.get_or_create(place_source=place_source, place_id=place_id)
+
+            self.filter(place_source=place_source, place_id=place_id).update(
+                stars_sum=F('stars_sum') + stars,
+                review_count=F('review_count') + count
+            )
+
+    def rebuild(self):
+        '''Recalculates the ratings of all places from their reviews.'''
+        ratings = Review.objects.values(
+            'visit__place_source', 'visit__place_id'
+        ).annotate(stars_sum=Sum('stars'), review_count=Count('id')).order_by()
+
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create([
+                PlaceRating(
+                    place_source=rating['visit__place_source'],
+                    place_id=rating['visit__place_id'],
+                    stars_sum=rating['stars_sum'],
+                    review_count=rating['review_count']
+                )
+                for rating in ratings
+            ], batch_size=1000)
+
+
+class PlaceRating(models.Model):
+    '''The denormalized rating of a place, kept up to date on review writes.'''
+    place_id = models.BigIntegerField()
+    place_source = models.CharField(
+        choices=PLACE_SOURCES, max_length=7, blank=False, null=False
+    )
+    review_count = models.PositiveIntegerField(default=0)
+    stars_sum = models.PositiveIntegerField(default=0)
+
+    objects = PlaceRatingManager()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('place_source', 'place_id'), name='unique_place_rating'
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.place_source} {self.place_id} ({self.stars})'
+
+    @property
+    def stars(self):
+        '''The average stars of the place's reviews.'''
+        if not self.review_count:
+            return None
+
+        return self.stars_sum / self.review_count
@@ -1,5 +1,6 @@
+from django.db import connection
 from rest_framework import serializers
-from .models import Route, Visit, Review
+from .models import Route, Visit, Review, PlaceRating
 
 
 class VisitSerializer(serializers.ModelSerializer):
@@ -8,6 +9,17 @@ class VisitSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class ReviewSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Review
+        fields = '__all__'
+
+
+class VisitReviewSerializer(VisitSerializer):
+    '''Includes the review of the visit, if any.'''
+    review = ReviewSerializer(read_only=True)
+
+
 class RouteSerializer(serializers.ModelSerializer):
     visits = serializers.SerializerMethodField()
 
@@ -17,12 +29,69 @@ class RouteSerializer(serializers.ModelSerializer):
         read_only_fields = ('user', 'finished', 'visits')
 
     def get_visits(self, obj):
-        return VisitSerializer(
+        # The reviews are only included when requested
+        serializer_class = VisitReviewSerializer \
+            if self.context.get('include_reviews') else VisitSerializer
+
+        return serializer_class(
             obj.visit_set.all(), many=True, read_only=True
         ).data
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class BulkReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
-        fields = '__all__'
+        fields = ('text', 'stars')
+
+
+class BulkVisitListSerializer(serializers.ListSerializer):
+    '''
+    Creates the visits of a route and their reviews with bulk inserts,
+    where the database returns the ids of the inserted rows.
+    '''
+
+    def create(self, validated_data):
+        reviews = [attrs.pop('review', None) for attrs in validated_data]
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            visits = Visit.objects.bulk_create(
+                [Visit(**attrs) for attrs in validated_data]
+            )
+        else:
+            # The reviews need the ids of the visits, which are not
+            # returned by bulk inserts on every database
+            visits = [
+                Visit.objects.create(**attrs) for attrs in validated_data
+            ]
+
+        reviewed = [
+            (visit, review)
+            for visit, review in zip(visits, reviews) if review is not None
+        ]
+
+        Review.objects.bulk_create(
+            [Review(visit=visit, **review) for visit, review in reviewed]
+        )
+
+        # Bulk inserts do not send signals, so the place ratings
+        # are updated here, once per reviewed place
+        ratings = {}
+        for visit, review in reviewed:
+            place = (visit.place_source, visit.place_id)
+            stars, count = ratings.get(place, (0, 0))
+            ratings[place] = (stars + review['stars'], count + 1)
+
+        for (place_source, place_id), (stars, count) in ratings.items():
+            PlaceRating.objects.record(place_source, place_id, stars, count)
+
+        return visits
+
+
+class BulkVisitSerializer(serializers.ModelSerializer):
+    '''A visit of the route given by the view, with an optional review.'''
+    review = BulkReviewSerializer(required=False)
+
+    class Meta:
+        model = Visit
+        fields = ('place_id', 'place_source', 'name', 'review')
+        list_serializer_class = BulkVisitListSerializer
@@ -0,0 +1,43 @@
+from django.db.models.signals import pre_save, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Review, PlaceRating
+
+
+@receiver(pre_save, sender=Review)
+def store_previous_rating(sender, instance, raw=False, **kwargs):
+    '''Keep the rating of the review before it gets updated.'''
+    if raw:
+        return
+
+    instance._previous_rating = Review.objects.filter(
+        pk=instance.pk
+    ).values_list(
+        'visit__place_source', 'visit__place_id', 'stars'
+    ).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Review)
+def update_place_rating(sender, instance, raw=False, **kwargs):
+    '''Update the place's rating with the created or updated review.'''
+    if raw:
+        return
+
+    previous = getattr(instance, '_previous_rating', None)
+
+    if previous is not None:
+        place_source, place_id, stars = previous
+        PlaceRating.objects.record(place_source, place_id, -stars, -1)
+
+    PlaceRating.objects.record(
+        instance.visit.place_source, instance.visit.place_id, instance.stars
+    )
+
+
+@receiver(pre_delete, sender=Review)
+def remove_place_rating(sender, instance, **kwargs):
+    '''Remove the deleted review from the place's rating.'''
+    PlaceRating.objects.record(
+        instance.visit.place_source, instance.visit.place_id,
+        -instance.stars, -1
+    )
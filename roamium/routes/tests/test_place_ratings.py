@@ -0,0 +1,90 @@
+import json
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from io import StringIO
+
+from routes.models import PlaceRating
+from shared.test_utils import create_review_payload, create_test_place,\
+    create_test_review, create_test_route, create_test_user,\
+    create_test_visit
+
+REVIEWS_URL = reverse('review-list')
+
+CONTENT_TYPE = 'application/json'
+
+
+class PlaceRatingTest(TestCase):
+    '''Tests for the denormalized place ratings'''
+
+    def setUp(self):
+        self.user = create_test_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.route = create_test_route(self.user)
+        self.place = create_test_place()
+
+    def get_rating(self):
+        return PlaceRating.objects.get(
+            place_source='roamium', place_id=self.place.id
+        )
+
+    def create_review(self, stars):
+        visit = create_test_visit(self.place, self.route)
+        payload = dict(create_review_payload(visit), stars=stars)
+
+        response = self.client.post(
+            REVIEWS_URL, json.dumps(payload), content_type=CONTENT_TYPE
+        )
+
+        return response.data['id']
+
+    def test_create_review(self):
+        '''Test that creating reviews updates the place's rating'''
+        self.create_review(3)
+        self.create_review(4)
+
+        rating = self.get_rating()
+        self.assertEquals(rating.review_count, 2)
+        self.assertEquals(rating.stars_sum, 7)
+        self.assertEquals(rating.stars, 3.5)
+
+    def test_update_review(self):
+        '''Test that updating a review updates the place's rating'''
+        review_id = self.create_review(3)
+
+        self.client.patch(
+            reverse('review-detail', args=(review_id,)),
+            json.dumps({'stars': 5}),
+            content_type=CONTENT_TYPE
+        )
+
+        rating = self.get_rating()
+        self.assertEquals(rating.review_count, 1)
+        self.assertEquals(rating.stars_sum, 5)
+
+    def test_delete_review(self):
+        '''Test that deleting a review updates the place's rating'''
+        review_id = self.create_review(3)
+        self.create_review(5)
+
+        self.client.delete(reverse('review-detail', args=(review_id,)))
+
+        rating = self.get_rating()
+        self.assertEquals(rating.review_count, 1)
+        self.assertEquals(rating.stars_sum, 5)
+
+    def test_rebuild_place_ratings(self):
+        '''Test that the place ratings can be rebuilt from the reviews'''
+        create_test_review(create_test_visit(self.place, self.route))
+        create_test_review(create_test_visit(self.place, self.route))
+
+        PlaceRating.objects.all().delete()
+        call_command('rebuild_place_ratings', stdout=StringIO())
+
+        rating = self.get_rating()
+        self.assertEquals(rating.review_count, 2)
+        self.assertEquals(rating.stars_sum, 6)
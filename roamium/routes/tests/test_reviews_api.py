@@ -1,9 +1,12 @@
 import json
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 
+from places.models import Place
 from routes.models import Review
 from shared.test_utils import create_review_payload, create_test_place,\
     create_test_review, create_test_route, create_test_user,\
@@ -409,6 +412,67 @@ class ReviewApiTest(TestCase):
         # Test that the response status code is 401
         self.assertEquals(response.status_code, 401)
 
+    def create_place_reviews(self, stars):
+        '''Create reviews with the given stars for the test visit's place'''
+        place = Place.objects.get(id=self.visit.place_id)
+        route = create_test_route(self.user)
+
+        for review_stars in stars:
+            Review.objects.create(
+                visit=create_test_visit(place, route),
+                text='Review text',
+                stars=review_stars
+            )
+
+    def test_get_place_reviews_paginated(self):
+        '''Test that the reviews of a place are paginated'''
+        self.create_place_reviews([5, 4, 3])
+        place_id = self.visit.place_id
+
+        response = self.client.get(
+            f'{REVIEWS_URL}place/?source=roamium&place_id={place_id}'
+            '&page_size=2'
+        )
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(len(response.data), 2)
+        self.assertIn('rel="next"', response['Link'])
+
+    def test_get_place_review_summary(self):
+        '''Test that the summary of a place's reviews is aggregated'''
+        self.create_place_reviews([5, 4, 4, 1])
+        place_id = self.visit.place_id
+
+        # Review a different place
+        create_test_review(self.create_visit(self.user))
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                f'{REVIEWS_URL}place/summary/'
+                f'?source=roamium&place_id={place_id}'
+            )
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(len(context.captured_queries), 1)
+
+        self.assertEquals(response.data, {
+            'count': 4,
+            'average': 3.5,
+            'histogram': {'1': 1, '2': 0, '3': 0, '4': 2, '5': 1}
+        })
+
+    def test_get_place_review_summary_invalid_place_id(self):
+        '''Test that the place_id parameter is validated for summaries'''
+        response = self.client.get(
+            f'{REVIEWS_URL}place/summary/?source=roamium&place_id=test'
+        )
+
+        self.assertEquals(response.status_code, 400)
+        self.assertEquals(
+            response.data['message'],
+            "Parameter 'place_id' must be an integer."
+        )
+
     def test_places_average_rating(self):
         '''Test that the average rating is returned in the places payload.'''
         # Create a route
@@ -1,11 +1,13 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 
 from routes.models import Route
 from shared.test_utils import create_test_place, create_test_route,\
-    create_test_user, create_test_visit, user_payload
+    create_test_user, create_test_visit, create_test_review, user_payload
 
 ROUTES_URL = reverse('route-list')
 
@@ -75,6 +77,63 @@ class RouteApiTest(TestCase):
         self.assertEquals(len(visits), 1)
         self.assertEquals(visits[0]['id'], visit.id)
 
+    def create_finished_routes(self, count):
+        '''Create finished routes with two visits, one of them reviewed'''
+        place = create_test_place()
+
+        for _ in range(count):
+            route = create_test_route(self.user)
+            create_test_review(create_test_visit(place, route))
+            create_test_visit(place, route)
+
+            route.finished = True
+            route.save()
+
+    def test_list_routes_queries_constant(self):
+        '''
+        Test that the number of queries for listing routes
+        does not depend on the number of routes and visits.
+        '''
+        def count_queries(url):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+
+            self.assertEquals(response.status_code, 200)
+            return len(context.captured_queries), response.data
+
+        url = ROUTES_URL + '?include=reviews'
+
+        self.create_finished_routes(2)
+        few, _ = count_queries(ROUTES_URL)
+        few_reviews, _ = count_queries(url)
+
+        self.create_finished_routes(8)
+        many, routes = count_queries(ROUTES_URL)
+        many_reviews, routes_reviews = count_queries(url)
+
+        self.assertEquals(few, many)
+        self.assertEquals(few_reviews, many_reviews)
+
+        # Test that the reviews were only included when requested
+        self.assertNotIn('review', routes[0]['visits'][0])
+        self.assertEquals(routes_reviews[0]['visits'][0]['review']['stars'], 3)
+        self.assertIsNone(routes_reviews[0]['visits'][1]['review'])
+
+    def test_list_routes_pagination(self):
+        '''Test that the routes are listed in pages ordered by id'''
+        self.create_finished_routes(5)
+        ids = list(Route.objects.order_by('id').values_list('id', flat=True))
+
+        response = self.client.get(ROUTES_URL, {'page_size': 2})
+        self.assertEquals([route['id'] for route in response.data], ids[:2])
+
+        # Test that the next page is linked in the response headers
+        next_url = response['Link'].split(';')[0].strip('<>')
+        response = self.client.get(next_url)
+
+        self.assertEquals([route['id'] for route in response.data], ids[2:4])
+        self.assertIn('rel="prev"', response['Link'])
+
     def test_list_routes_unauthenticated_user(self):
         '''Test that unauthenticated users can not list routes'''
         # Log the user out
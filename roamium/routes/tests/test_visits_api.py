@@ -3,7 +3,7 @@ from django.urls import reverse
 
 from rest_framework.test import APIClient
 
-from routes.models import Visit
+from routes.models import Visit, Review, PlaceRating
 from shared.test_utils import create_test_route, create_test_user,\
     create_test_place, create_test_visit,\
     create_visit_payload, user_payload
@@ -208,3 +208,81 @@ class VisitApiTest(TestCase):
 
         # Test that the response status code is 404
         self.assertEquals(response.status_code, 404)
+
+    def bulk_payload(self, place):
+        '''Create a payload of three visits of a place, two reviewed'''
+        return [
+            {
+                'place_id': place.id,
+                'place_source': 'roamium',
+                'name': place.name,
+                'review': {'text': 'Review text', 'stars': stars}
+            }
+            for stars in (5, 2)
+        ] + [{
+            'place_id': place.id,
+            'place_source': 'roamium',
+            'name': place.name
+        }]
+
+    def test_create_visits_bulk(self):
+        '''Test that users can create many visits of a route at once'''
+        route = create_test_route(self.user)
+        place = create_test_place()
+
+        response = self.client.post(
+            reverse('route-visits', args=(route.id,)),
+            json.dumps(self.bulk_payload(place)), content_type=CONTENT_TYPE
+        )
+
+        # Test that the response status code is 201
+        self.assertEquals(response.status_code, 201)
+
+        # Test that the visits and reviews were created
+        self.assertEquals(route.visit_set.count(), 3)
+        self.assertEquals(
+            [visit['review'] and visit['review']['stars']
+             for visit in response.data],
+            [5, 2, None]
+        )
+        self.assertEquals(
+            Review.objects.filter(visit__route=route).count(), 2
+        )
+
+        # Test that the place's rating includes the reviews
+        rating = PlaceRating.objects.get(
+            place_source='roamium', place_id=place.id
+        )
+        self.assertEquals(rating.stars, 3.5)
+
+    def test_create_visits_bulk_invalid(self):
+        '''Test that no visits are created if any of them is invalid'''
+        route = create_test_route(self.user)
+        payload = self.bulk_payload(create_test_place())
+        payload[1]['review']['stars'] = 6
+
+        response = self.client.post(
+            reverse('route-visits', args=(route.id,)),
+            json.dumps(payload), content_type=CONTENT_TYPE
+        )
+
+        # Test that the response status code is 400
+        self.assertEquals(response.status_code, 400)
+        self.assertEquals(route.visit_set.count(), 0)
+
+    def test_create_visits_bulk_different_user(self):
+        '''Test that users can not add visits to others' routes'''
+        different_user = create_test_user(
+            user_payload.update(email='test10@email.com')
+        )
+        route = create_test_route(different_user)
+
+        response = self.client.post(
+            reverse('route-visits', args=(route.id,)),
+            json.dumps(self.bulk_payload(create_test_place())),
+            content_type=CONTENT_TYPE
+        )
+
+        # Test that the response status code is 404
+        self.assertEquals(response.status_code, 404)
+        self.assertEquals(route.visit_set.count(), 0)
@@ -2,12 +2,19 @@ from rest_framework.response import Response
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from django.db.models import Avg, Count, Prefetch, Q
 
 from .models import PLACE_SOURCES, Route, Visit, Review
-from .serializers import RouteSerializer, VisitSerializer, ReviewSerializer
+from .serializers import RouteSerializer, VisitSerializer, \
+    VisitReviewSerializer, ReviewSerializer, BulkVisitSerializer
 from .permissions import IsRouteOwner, IsVisitOwner
 
 
+# The maximum number of visits that can be created with a single request
+MAX_BULK_VISITS = 500
+
+
 class RouteViewSet(mixins.CreateModelMixin,
                    mixins.RetrieveModelMixin,
                    mixins.DestroyModelMixin,
@@ -17,8 +24,33 @@ class RouteViewSet(mixins.CreateModelMixin,
     queryset = Route.objects.all()
     serializer_class = RouteSerializer
 
+    def include_reviews(self) -> bool:
+        '''Whether the reviews of the visits were requested.'''
+        return 'reviews' in self.request.query_params.get(
+            'include', ''
+        ).split(',')
+
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+
+        # Only the route is needed to add visits to it
+        if self.action == 'visits':
+            return queryset
+
+        visits = Visit.objects.order_by('id')
+
+        if self.include_reviews():
+            visits = visits.select_related('review')
+
+        # Fetch the visits of all the routes with a single query
+        return queryset.prefetch_related(
+            Prefetch('visit_set', queryset=visits)
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_reviews'] = self.include_reviews()
+        return context
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -50,6 +82,37 @@ class RouteViewSet(mixins.CreateModelMixin,
             status=status.HTTP_200_OK
         )
 
+    @action(detail=True, methods=['POST'])
+    def visits(self, request, pk=None):
+        '''
+        Create a list of visits, each with an optional review,
+        for a route (e.g. recorded while offline) at once.
+        '''
+        # The route is only looked up among the user's routes
+        route = self.get_object()
+
+        if len(request.data) > MAX_BULK_VISITS:
+            return Response(
+                {'detail': f'At most {MAX_BULK_VISITS} visits are allowed.'},
+                status.HTTP_400_BAD_REQUEST
+            )
+
+        # Validate all the visits in a single pass
+        serializer = BulkVisitSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            visits = serializer.save(route=route)
+
+        visits = Visit.objects.filter(
+            pk__in=[visit.pk for visit in visits]
+        ).select_related('review').order_by('id')
+
+        return Response(
+            VisitReviewSerializer(visits, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
 
 class VisitViewSet(mixins.CreateModelMixin,
                    mixins.RetrieveModelMixin,
@@ -76,6 +139,9 @@ class VisitViewSet(mixins.CreateModelMixin,
 
 ACCEPTED_PLACE_SOURCES = list(map(lambda source: source[0], PLACE_SOURCES))
 
+# The possible stars of a review
+STARS = range(1, 6)
+
 
 class ReviewViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAuthenticated, IsVisitOwner)
@@ -87,45 +153,91 @@ class ReviewViewSet(viewsets.ModelViewSet):
             return self.queryset.filter(visit__route__user=self.request.user)
         return self.queryset
 
-    @action(detail=False, methods=['GET'])
-    def place(self, request):
+    # Reviews and place ratings are written in the same transaction
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+
+    def _get_place_reviews(self, request):
+        '''
+        Get the reviews of the place given by the request's parameters.
+        Raises ValueError with a message for invalid parameters.
+        '''
         # Get the place source form query parameters
         source = str(request.query_params.get('source'))
 
         # Validate source
         if not source:
-            return Response(
-                {'message': "String parameter 'source' is required."},
-                status.HTTP_400_BAD_REQUEST
-            )
+            raise ValueError("String parameter 'source' is required.")
 
         if source not in ACCEPTED_PLACE_SOURCES:
             joined_values = ','.join(ACCEPTED_PLACE_SOURCES)
-            message = f"'{source}' is not in ({joined_values})."
-
-            return Response(
-                {'message': message},
-                status.HTTP_400_BAD_REQUEST
-            )
+            raise ValueError(f"'{source}' is not in ({joined_values}).")
 
         # Get the place id from query parameters
         try:
             place_id = int(request.query_params.get('place_id'))
         except ValueError:
+            raise ValueError("Parameter 'place_id' must be an integer.")
+        except TypeError:
+            raise ValueError("Parameter 'place_id' is required.")
+
+        # The reviews are found through the (place_source, place_id) index
+        return Review.objects.filter(
+            visit__place_source=source,
+            visit__place_id=place_id
+        )
+
+    @action(detail=False, methods=['GET'])
+    def place(self, request):
+        try:
+            reviews = self._get_place_reviews(request)
+        except ValueError as error:
             return Response(
-                {'message': "Parameter 'place_id' must be an integer."},
+                {'message': str(error)},
                 status.HTTP_400_BAD_REQUEST
             )
-        except TypeError:
+
+        page = self.paginate_queryset(reviews)
+
+        return self.get_paginated_response(
+            ReviewSerializer(page, many=True).data
+        )
+
+    @action(detail=False, methods=['GET'], url_path='place/summary')
+    def place_summary(self, request):
+        '''The number, average and histogram of the place's stars.'''
+        try:
+            reviews = self._get_place_reviews(request)
+        except ValueError as error:
             return Response(
-                {'message': "Parameter 'place_id' is required."},
+                {'message': str(error)},
                 status.HTTP_400_BAD_REQUEST
             )
 
-        # Get the place's reviews
-        reviews = Review.objects.filter(
-            visit__place_source=source,
-            visit__place_id=place_id
+        # Aggregate everything with a single query
+        summary = reviews.aggregate(
+            count=Count('id'),
+            average=Avg('stars'),
+            **{
+                f'stars_{stars}': Count('id', filter=Q(stars=stars))
+                for stars in STARS
+            }
         )
 
-        return Response(ReviewSerializer(reviews, many=True).data)
+        return Response({
+            'count': summary['count'],
+            'average': summary['average'],
+            'histogram': {
+                str(stars): summary[f'stars_{stars}'] for stars in STARS
+            }
+        })
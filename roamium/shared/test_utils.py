@@ -89,3 +89,21 @@ def create_test_review(visit):
     serializer = ReviewSerializer(data=payload)
     serializer.is_valid()
     return serializer.save()
+
+
+def create_test_element(id, longitude, latitude, **tags):
+    '''
+    Create an Overpass node element with the given tags,
+    named after its id unless a name (or None) is given
+    '''
+    tags = dict({'name': f'Place {id}'}, **tags)
+
+    return {
+        'type': 'node',
+        'id': id,
+        'lon': longitude,
+        'lat': latitude,
+        'tags': {
+            tag: value for tag, value in tags.items() if value is not None
+        }
+    }